@@ -0,0 +1,105 @@
+"""
+Tank AI shared by the server (game_server.py) and the pygame client (game.py).
+
+Planning is the expensive part: raycasting for line of sight and choosing
+where to drive. Each AI tank replans only every PLAN_INTERVAL seconds, and
+the tanks are staggered so they don't all plan on the same tick. Between
+plans the per-tick step just follows the last plan. It adds the planned
+move each tick. When it may fire, it aims where the target will be when the
+bullet gets there, and fires only if the last raycast found a clear line.
+
+Everything here works on plain numbers and (left, top, width, height) boxes.
+"""
+import math
+
+from collision import segment_aabb
+
+PLAN_INTERVAL = 0.25   # seconds between plans for each AI tank
+FIRE_RANGE = 300       # only shoot at targets closer than this
+PREFERRED_RANGE = 180  # with a clear line, hold about this far from the target
+COVER_HEALTH = 40      # at or below this health, head for the nearest bush
+SIGHT_RADIUS = 400     # how far around itself a tank looks for cover
+
+
+def lead_angle(sx, sy, tx, ty, vx, vy, speed):
+    """
+    Angle to fire from (sx, sy) so that a bullet moving speed per tick meets
+    a target at (tx, ty) moving (vx, vy) per tick. Aims straight at the
+    target when it is too fast to catch.
+    """
+    dx, dy = tx - sx, ty - sy
+    # Solve |d + v t| = speed * t for the earliest t > 0.
+    a = vx * vx + vy * vy - speed * speed
+    b = 2 * (dx * vx + dy * vy)
+    c = dx * dx + dy * dy
+    t = None
+    if abs(a) < 1e-9:
+        if b < 0:
+            t = -c / b
+    else:
+        disc = b * b - 4 * a * c
+        if disc >= 0:
+            root = math.sqrt(disc)
+            times = [x for x in ((-b - root) / (2 * a), (-b + root) / (2 * a)) if x > 0]
+            if times:
+                t = min(times)
+    if t is None:
+        return math.atan2(dy, dx)
+    return math.atan2(dy + vy * t, dx + vx * t)
+
+
+def clear_line(x0, y0, x1, y1, boxes):
+    """True if none of the boxes blocks the segment."""
+    return all(segment_aabb(x0, y0, x1, y1, *box) is None for box in boxes)
+
+
+def nearest_center(x, y, boxes):
+    # Centre of the closest box, or None if there are none.
+    best, best_d = None, None
+    for left, top, width, height in boxes:
+        cx, cy = left + width / 2, top + height / 2
+        d = (cx - x) ** 2 + (cy - y) ** 2
+        if best_d is None or d < best_d:
+            best, best_d = (cx, cy), d
+    return best
+
+
+def plan(x, y, health, tx, ty, obstacles, bushes):
+    """
+    Plan for an AI tank centred on (x, y) against a target centred on
+    (tx, ty). obstacles are the boxes that could block the line between
+    them; bushes the ones near the tank. Returns {'goal': (x, y) to drive
+    to, 'clear': whether the line of sight is clear, 'in_range': whether
+    the target is within FIRE_RANGE}.
+    """
+    # A target sitting inside terrain can only be reached by shooting the
+    # terrain away, so that box doesn't count as blocking.
+    obstacles = [box for box in obstacles
+                 if not (box[0] < tx < box[0] + box[2] and box[1] < ty < box[1] + box[3])]
+    clear = clear_line(x, y, tx, ty, obstacles)
+    distance = math.hypot(tx - x, ty - y)
+    result = {'goal': (tx, ty), 'clear': clear, 'in_range': distance < FIRE_RANGE}
+    cover = nearest_center(x, y, bushes) if health <= COVER_HEALTH else None
+    if cover is not None:
+        # Hurt: hide in the nearest bush and shoot from there if possible.
+        result['goal'] = cover
+    elif clear and distance > 0:
+        # In sight: close in or back off to PREFERRED_RANGE along the line.
+        k = (distance - PREFERRED_RANGE) / distance
+        result['goal'] = (x + (tx - x) * k, y + (ty - y) * k)
+    # Otherwise drive at the target until the line opens up. Tanks pass
+    # through terrain, so this always gets there.
+    return result
+
+
+def route(x, y, goal, speed):
+    """
+    Per-tick (dx, dy) that drives from (x, y) to goal at speed per tick, and
+    the number of ticks to apply it for.
+    """
+    dx, dy = goal[0] - x, goal[1] - y
+    distance = math.hypot(dx, dy)
+    if distance == 0 or speed <= 0:
+        return (0.0, 0.0), 0
+    steps = math.ceil(distance / speed)
+    return (dx / steps, dy / steps), steps
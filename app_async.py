@@ -0,0 +1,131 @@
+"""
+asyncio backend: the same game and Socket.IO events as app.py, served by
+python-socketio's AsyncServer under an ASGI server instead of Flask + eventlet.
+
+    uvicorn app_async:app --port 5000
+
+The tick and matchmaking loops are asyncio tasks started with the first
+connection, so they run on whatever event loop the ASGI server provides.
+"""
+import asyncio
+import json
+import time
+
+import socketio
+
+from game_server import TICK_INTERVAL
+from matchmaking import MATCH_INTERVAL, Lobby
+
+lobby = Lobby()
+
+async def metrics_app(scope, receive, send):
+    # Plain ASGI handler for /metrics, the same JSON as app.py's route.
+    if scope['type'] != 'http' or scope['path'] != '/metrics':
+        await send({'type': 'http.response.start', 'status': 404, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    body = json.dumps(lobby.metrics()).encode()
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', b'application/json')]})
+    await send({'type': 'http.response.body', 'body': body})
+
+sio = socketio.AsyncServer(async_mode='asgi')
+app = socketio.ASGIApp(sio, other_asgi_app=metrics_app, static_files={
+    '/': 'templates/index.html',
+    '/static': 'static'
+})
+loop_tasks = None
+
+async def flush():
+    # Put newly matched players in their room, then send everything the
+    # lobby and its rooms queued during the last handler or tick.
+    joins, messages = lobby.drain()
+    for sid, room_id in joins:
+        await sio.enter_room(sid, room_id)
+    for event, data, to in messages:
+        await sio.emit(event, data, to=to)
+
+# -------------------------------
+# SOCKET.IO EVENT HANDLERS
+# -------------------------------
+@sio.event
+async def connect(sid, environ):
+    global loop_tasks
+    if loop_tasks is None:
+        loop = asyncio.get_running_loop()
+        loop_tasks = (loop.create_task(game_loop()), loop.create_task(matchmaking_loop()))
+
+@sio.event
+async def ping_check(sid, data):
+    # Acknowledged straight away so the client can time the round trip.
+    return data
+
+@sio.event
+async def join(sid, data):
+    lobby.handle_join(sid, data, time.time())
+    await flush()
+
+@sio.event
+async def spectate(sid, data):
+    lobby.handle_spectate(sid, data or {})
+    await flush()
+
+@sio.event
+async def player_update(sid, data):
+    room = lobby.room_of(sid)
+    if room:
+        room.handle_player_update(sid, data)
+
+@sio.event
+async def shoot(sid, data):
+    room = lobby.room_of(sid)
+    if room:
+        room.handle_shoot(sid, data)
+
+@sio.event
+async def skill(sid, data):
+    room = lobby.room_of(sid)
+    if room:
+        room.handle_skill(sid, data)
+
+@sio.event
+async def chat(sid, data):
+    room = lobby.room_of(sid)
+    if room:
+        room.handle_chat(sid, data)
+        await flush()
+
+@sio.event
+async def disconnect(sid):
+    lobby.handle_disconnect(sid)
+    await flush()
+
+# -------------------------------
+# GAME LOOP (asyncio task)
+# -------------------------------
+async def game_loop():
+    # Sleep to the next tick deadline rather than a fixed interval so time
+    # spent emitting does not stretch the tick period.
+    next_tick = time.monotonic()
+    while True:
+        next_tick += TICK_INTERVAL
+        await asyncio.sleep(max(0, next_tick - time.monotonic()))
+        lobby.tick(time.time())
+        await flush()
+
+async def matchmaking_loop():
+    # Matching runs in batches on its own task so a big queue never delays a tick.
+    while True:
+        await asyncio.sleep(MATCH_INTERVAL)
+        for _ in lobby.match(time.time()):
+            await flush()
+            await asyncio.sleep(0)  # let the tick run between chunks of rooms
+        await flush()
+        # Profile writes go to a worker thread so they never block the loop.
+        profiles = lobby.profiles.snapshot()
+        if profiles is not None:
+            await asyncio.to_thread(lobby.profiles.write, profiles)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='127.0.0.1', port=5000)
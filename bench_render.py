@@ -0,0 +1,75 @@
+"""
+Compare the full-redraw and dirty-rectangle render paths in game.py.
+
+Runs the same seeded scene through both modes for a fixed number of frames
+without frame-rate capping and prints frames per second and CPU time per
+frame. Uses SDL's dummy video driver unless another one is set, e.g.
+
+    python bench_render.py
+    SDL_VIDEODRIVER=x11 python bench_render.py 2000
+"""
+import os
+import sys
+import time
+import random
+import math
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import game
+
+
+def setup_scene(seed):
+    random.seed(seed)
+    game.bullets[:] = []
+    game.obstacles[:] = []
+    game.bushes[:] = []
+    game.powerups[:] = []
+    game.explosions[:] = []
+    game.spawn_obstacles()
+    game.spawn_bushes()
+    for _ in range(3):
+        game.spawn_powerup()
+    tanks = [game.Tank(100, 100, game.BLUE, {}), game.Tank(600, 400, game.RED, {}, is_ai=True)]
+    game.dirty_rects = []
+    game.invalidate_background()
+    return tanks
+
+
+def run(mode, frames, seed=1):
+    game.RENDER_MODE = mode
+    tanks = setup_scene(seed)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for frame in range(frames):
+        # Move the tanks in circles and keep a stream of bullets in flight so
+        # both paths have the same amount of moving work to draw.
+        for idx, tank in enumerate(tanks):
+            angle = frame / 30 + idx * math.pi
+            tank.pos.update(400 + 200 * math.cos(angle), 300 + 150 * math.sin(angle))
+            tank.direction = pygame.Vector2(math.cos(angle), math.sin(angle))
+            tank.update(frame * 16)
+        if frame % 10 == 0:
+            tanks[frame % 2].shoot(frame * 1000)
+        for bullet in game.bullets[:]:
+            bullet.update()
+        game.render(tanks, 600000 - frame * 16)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    return frames / wall, cpu / frames * 1000
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    results = {}
+    for mode in ("full", "dirty"):
+        fps, cpu_ms = run(mode, frames)
+        results[mode] = (fps, cpu_ms)
+        print(f"{mode:>5}: {fps:8.1f} FPS  {cpu_ms:6.3f} ms CPU per frame")
+    speedup = results["full"][1] / results["dirty"][1] if results["dirty"][1] else float("inf")
+    print(f"dirty-rect rendering uses {speedup:.2f}x less CPU per frame than full redraw")
+
+
+if __name__ == "__main__":
+    main()
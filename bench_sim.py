@@ -0,0 +1,282 @@
+"""
+Microbenchmarks for the simulation hot paths, on the server (game_server.py)
+and in the pygame client (game.py).
+
+Every case builds a seeded synthetic world at each size, from 2 tanks and 10
+bullets up to 200 tanks and 5000 bullets, and times a short burst of calls.
+Nothing is drawn and nothing touches the network; SDL's dummy video driver
+is used unless another one is set. Save a baseline, then compare later runs
+against it:
+
+    python bench_sim.py --save bench_baseline.json
+    python bench_sim.py --compare bench_baseline.json --threshold 0.2
+    python bench_sim.py --only server.ai --sizes small,large
+
+A case is flagged as a regression when its best time, relative to a fixed
+calibration loop timed alongside it, is more than threshold (a fraction)
+slower than in the baseline; the script then exits with status 1.
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import game
+import game_server
+from game_server import GameRoom
+
+# name: (tanks, bullets, power-ups)
+SIZES = {
+    "small": (2, 10, 3),
+    "medium": (20, 200, 20),
+    "large": (50, 1000, 50),
+    "extreme": (200, 5000, 200),
+}
+ROUNDS = 7          # fresh world per round; the best round is reported
+CALLS = 10          # consecutive calls timed per round (a short burst of ticks)
+MIN_TIMED = 0.25    # seconds; cheap cases get extra rounds until they reach it
+MAX_ROUNDS = 1000
+
+
+# -------------------------------
+# SERVER (game_server.GameRoom)
+# -------------------------------
+def server_room(tanks, bullets, powerups, ai=False):
+    room = GameRoom()
+    room.game_active = True
+    room.spawn_obstacles()
+    room.spawn_bushes()
+    for i in range(tanks):
+        if ai and i > 0:
+            room.spawn_ai()
+            continue
+        sid = f"sid{i}"
+        room.handle_join(sid, {'name': f"bench{i}", 'mode': 'pvp'})
+        # Nobody dies during a run, so every round does the same work.
+        room.players[sid]['health'] = 10**9
+    room.drain()
+    owners = list(room.players)
+    for _ in range(bullets):
+        room.bullets.append({
+            'id': next(game_server.bullet_ids),
+            'x': random.uniform(0, game_server.WORLD_WIDTH),
+            'y': random.uniform(0, game_server.WORLD_HEIGHT),
+            'angle': random.uniform(0, 2 * math.pi),
+            'speed': 5,
+            'damage': 20,
+            'owner': random.choice(owners),
+            'skill': None
+        })
+    for _ in range(powerups):
+        room.spawn_powerup()
+    return room
+
+
+def bench_server_bullets(size):
+    room = server_room(*size)
+    return room.move_bullets
+
+
+def bench_server_ai(size):
+    room = server_room(*size, ai=True)
+    ai_players = [p for p in room.players.values() if p['mode'] == 'ai']
+    def run():
+        room.timers.advance()  # AI planning runs on the timer wheel
+        for p in ai_players:
+            room.update_ai(p)
+    return run
+
+
+def bench_server_powerups(size):
+    room = server_room(*size)
+    return room.collect_powerups
+
+
+def bench_server_serialize(size):
+    room = server_room(*size)
+    # Socket.IO sends the state as JSON, so that is what each tick pays for.
+    return lambda: json.dumps(room.game_state(time.time()))
+
+
+def bench_server_tick(size):
+    room = server_room(*size)
+    def run():
+        room.tick(time.time())
+        room.drain()
+    return run
+
+
+# -------------------------------
+# CLIENT (game.py)
+# -------------------------------
+PLAYER_CONTROLS = {
+    "up": pygame.K_w, "down": pygame.K_s, "left": pygame.K_a, "right": pygame.K_d,
+    "shoot": pygame.K_SPACE, "skill_q": pygame.K_q, "skill_e": pygame.K_e, "skill_r": pygame.K_r
+}
+
+
+def client_world(tanks, bullets, powerups):
+    # game.py keeps its world in module globals; rebuild them in place.
+    game.bullets[:] = []
+    game.obstacles[:] = []
+    game.bushes[:] = []
+    game.powerups[:] = []
+    game.explosions[:] = []
+    game.timers = game.TimerWheel()
+    game.spawn_obstacles()
+    game.spawn_bushes()
+    for _ in range(powerups):
+        game.spawn_powerup()
+    tank_list = [game.Tank(random.uniform(0, game.WIDTH - 40), random.uniform(0, game.HEIGHT - 40),
+                           game.BLUE if i == 0 else game.RED, PLAYER_CONTROLS if i == 0 else {}, is_ai=i > 0)
+                 for i in range(tanks)]
+    for tank in tank_list:
+        tank.health = 10**9
+    for _ in range(bullets):
+        angle = random.uniform(0, 2 * math.pi)
+        game.bullets.append(game.Bullet((random.uniform(0, game.WIDTH), random.uniform(0, game.HEIGHT)),
+                                        pygame.Vector2(math.cos(angle), math.sin(angle)),
+                                        5, 20, random.choice(tank_list)))
+    return tank_list
+
+
+def bench_client_tank_update(size):
+    tanks = client_world(*size)
+    def run():
+        for tank in tanks:
+            tank.update(0)
+    return run
+
+
+def bench_client_bullet_update(size):
+    client_world(*size)
+    def run():
+        for bullet in game.bullets[:]:
+            bullet.update()
+    return run
+
+
+def bench_client_ai(size):
+    tanks = client_world(*size)
+    clock = iter(range(0, 10**9, 16))
+    def run():
+        now = next(clock)
+        for tank in tanks[1:]:
+            game.ai_control(tank, tanks[0], now)
+    return run
+
+
+def bench_client_simulate_tick(size):
+    tanks = client_world(*size)
+    keys = defaultdict(bool)
+    clock = iter(range(0, 10**9, 16))
+    return lambda: game.simulate_tick(tanks, keys, next(clock))
+
+
+CASES = {
+    "server.bullets": bench_server_bullets,
+    "server.ai": bench_server_ai,
+    "server.powerups": bench_server_powerups,
+    "server.serialize": bench_server_serialize,
+    "server.tick": bench_server_tick,
+    "client.tank_update": bench_client_tank_update,
+    "client.bullet_update": bench_client_bullet_update,
+    "client.ai": bench_client_ai,
+    "client.simulate_tick": bench_client_simulate_tick,
+}
+
+
+# -------------------------------
+# RUNNER
+# -------------------------------
+def calibrate():
+    # A fixed pure-Python workload timed in every round next to the case.
+    # Comparisons are made relative to it, so a machine that is uniformly
+    # slower or faster than when the baseline was saved is not a regression.
+    start = time.perf_counter()
+    total = 0.0
+    for i in range(5000):
+        total += math.hypot(i, i + 1) * 0.5
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(setup, size, seed):
+    """
+    Best and median milliseconds per call over at least ROUNDS fresh worlds,
+    plus the best calibration time seen over the same rounds.
+    """
+    per_call = []
+    calibration = float('inf')
+    timed = 0.0
+    while len(per_call) < ROUNDS or (timed < MIN_TIMED and len(per_call) < MAX_ROUNDS):
+        random.seed(seed)  # the same world every round
+        run = setup(size)
+        calibration = min(calibration, calibrate())
+        start = time.perf_counter()
+        for _ in range(CALLS):
+            run()
+        elapsed = time.perf_counter() - start
+        timed += elapsed
+        per_call.append(elapsed / CALLS * 1000)
+    per_call.sort()
+    return per_call[0], per_call[len(per_call) // 2], calibration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--only', default='', help="run cases whose name contains this")
+    parser.add_argument('--sizes', default=','.join(SIZES), help="comma-separated subset of " + ', '.join(SIZES))
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save', metavar='FILE', help="write the results as a new baseline")
+    parser.add_argument('--compare', metavar='FILE', help="flag cases slower than this baseline")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown, as a fraction")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+
+    results = {}
+    regressions = []
+    print(f"{'case':<34}{'best ms':>10}{'median ms':>11}{'baseline':>10}")
+    # The game code prints on every shot and join; keep that out of the report.
+    with open(os.devnull, 'w') as quiet:
+        for name, setup in CASES.items():
+            if args.only not in name:
+                continue
+            for size_name in args.sizes.split(','):
+                key = f"{name}/{size_name}"
+                with contextlib.redirect_stdout(quiet):
+                    best, median, calibration = measure(setup, SIZES[size_name], args.seed)
+                results[key] = {'best_ms': best, 'median_ms': median, 'calibration_ms': calibration}
+                line = f"{key:<34}{best:>10.3f}{median:>11.3f}"
+                if key in baseline:
+                    base = baseline[key]
+                    ratio = (best / calibration) / (base['best_ms'] / base['calibration_ms'])
+                    line += f"{ratio:>9.2f}x"
+                    if ratio > 1 + args.threshold:
+                        line += "  REGRESSION"
+                        regressions.append(key)
+                print(line)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'seed': args.seed,
+                       'rounds': ROUNDS, 'calls': CALLS, 'results': results}, f, indent=2)
+        print(f"baseline saved to {args.save}")
+    if regressions:
+        print(f"{len(regressions)} case(s) more than {args.threshold:.0%} slower than the baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
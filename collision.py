@@ -0,0 +1,47 @@
+"""
+Swept (continuous) collision tests for projectiles, shared by game.py and the
+server.
+
+A bullet is tested along the segment it travelled during the tick rather
+than at its end position, so hits no longer depend on the tick rate or on
+bullets moving less than a tank or obstacle width per step.
+"""
+
+
+def segment_aabb(x0, y0, x1, y1, left, top, width, height):
+    """
+    Fraction (0..1) of the way along (x0, y0) -> (x1, y1) at which the segment
+    first enters the box, or None if it never does. Like the old point tests,
+    only the box interior counts; a segment starting inside hits at 0.
+    """
+    t_enter, t_exit = 0.0, 1.0
+    for start, delta, low, high in ((x0, x1 - x0, left, left + width),
+                                    (y0, y1 - y0, top, top + height)):
+        if delta == 0:
+            if start <= low or start >= high:
+                return None
+            continue
+        t_low = (low - start) / delta
+        t_high = (high - start) / delta
+        if t_low > t_high:
+            t_low, t_high = t_high, t_low
+        if t_low > t_enter:
+            t_enter = t_low
+        if t_high < t_exit:
+            t_exit = t_high
+        if t_enter >= t_exit:
+            return None
+    return t_enter
+
+
+def first_hit(x0, y0, x1, y1, candidates, box):
+    """
+    Earliest candidate the segment runs into, as (t, candidate), or
+    (None, None). box(candidate) gives its (left, top, width, height).
+    """
+    best_t, best = None, None
+    for candidate in candidates:
+        t = segment_aabb(x0, y0, x1, y1, *box(candidate))
+        if t is not None and (best_t is None or t < best_t):
+            best_t, best = t, candidate
+    return best_t, best
@@ -0,0 +1,2 @@
+# The game modules live at the top level of the repo; this file makes pytest
+# put it on sys.path so tests/ can import them.
@@ -1,17 +1,46 @@
 import pygame
+import os
 import sys
 import random
 import math
+import time
+from functools import lru_cache
+
+import ai
+from collision import first_hit
+from netplay import NetClient
+from scheduler import TimerWheel
 
 # =============================
 # INITIALIZATION & CONSTANTS
 # =============================
 pygame.init()
 WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
+VSYNC = os.environ.get("TANK_VSYNC") == "1"
+if VSYNC:
+    screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.SCALED, vsync=1)
+else:
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Pixel Tank Battle")
 clock = pygame.time.Clock()
-FPS = 60
+FPS = 60  # menu screens
+
+# Simulation pacing: the world advances in fixed logical ticks (all per-tick
+# speeds and timers were tuned for 60 per second), while the match renders as
+# fast as it can, or at TANK_MAX_FPS / vsync, interpolating between the last
+# two ticks.
+SIM_RATE = 60
+MAX_FRAME_MS = 250  # clamp long stalls so the sim doesn't spiral catching up
+MAX_RENDER_FPS = int(os.environ.get("TANK_MAX_FPS", "0"))  # 0 = uncapped
+# Fast-forward: with SDL_VIDEODRIVER=dummy and TANK_FAST_FORWARD=1 the match
+# skips the menus and rendering and steps the simulation as fast as possible.
+FAST_FORWARD = (os.environ.get("TANK_FAST_FORWARD") == "1" and
+                os.environ.get("SDL_VIDEODRIVER") == "dummy")
+
+# Network play against the app.py server
+SERVER_URL = os.environ.get("TANK_SERVER_URL", "http://localhost:5000")
+NET_MODE = os.environ.get("TANK_NET_MODE", "pve")
+PLAYER_NAME = os.environ.get("TANK_NAME", "Player")
 
 # Colors
 WHITE      = (255, 255, 255)
@@ -24,11 +53,26 @@ GREY       = (100, 100, 100)
 BROWN      = (139, 69, 19)
 ORANGE     = (255, 165, 0)
 DARK_GREEN = (0, 100, 0)
+BUSH_GREEN = (34, 139, 34)
+SKY_BLUE   = (135, 206, 250)
+
+POWERUP_COLORS = {
+    "speed": BLUE,
+    "shield": SKY_BLUE,
+    "damage": ORANGE,
+    "health": RED,
+    "xp": YELLOW
+}
 
 # Fonts
 font = pygame.font.SysFont("Arial", 20)
 big_font = pygame.font.SysFont("Arial", 40)
 
+# Rendering mode: "dirty" keeps the static terrain in a cached background layer
+# and only pushes the regions that changed; "full" redraws and flips the whole
+# screen every frame.
+RENDER_MODE = os.environ.get("TANK_RENDER_MODE", "dirty")
+
 # Global game object lists
 bullets = []
 obstacles = []
@@ -36,6 +80,60 @@ bushes = []
 powerups = []
 explosions = []
 
+# Timed events (power-up expiry, explosions, power-up spawns), in sim ticks
+timers = TimerWheel()
+POWERUP_TICKS = 5 * SIM_RATE     # power-up effects last 5 seconds
+POWERUP_INTERVAL = 5 * SIM_RATE  # new power-up every 5 seconds
+EXPLOSION_TICKS = 30
+AI_PLAN_TICKS = int(ai.PLAN_INTERVAL * SIM_RATE)  # ticks between AI plans
+AI_SKILL_INTERVAL = 2000  # ms between AI skill volleys
+
+# Dirty-rectangle rendering state
+background = None  # pre-rendered terrain layer, rebuilt when it changes
+dirty_rects = []   # screen regions drawn last frame that need erasing
+
+# =============================
+# SPRITE & TEXT CACHES
+# =============================
+
+# Converted sprite surfaces keyed by (kind, size, color, alpha). "rect" sizes
+# are (width, height); "circle" and "ring" sizes are a radius.
+surface_cache = {}
+
+def get_surface(kind, size, color, alpha=255):
+    key = (kind, size, color, alpha)
+    surf = surface_cache.get(key)
+    if surf is None:
+        rgba = (color[0], color[1], color[2], alpha)
+        if kind == "rect":
+            surf = pygame.Surface(size, pygame.SRCALPHA)
+            surf.fill(rgba)
+        else:
+            surf = pygame.Surface((size * 2 + 1, size * 2 + 1), pygame.SRCALPHA)
+            width = 2 if kind == "ring" else 0
+            pygame.draw.circle(surf, rgba, (size, size), size, width)
+        surf = surf.convert_alpha()
+        surface_cache[key] = surf
+    return surf
+
+def build_atlas():
+    """Pre-build every sprite the game draws so frames only blit."""
+    for color in (BLUE, RED):
+        get_surface("rect", (40, 40), color)
+        get_surface("rect", (40, 40), color, 100)  # stealth
+    get_surface("rect", (60, 60), BUSH_GREEN, 150)
+    get_surface("circle", 5, YELLOW)
+    get_surface("circle", 5, ORANGE)
+    for color in POWERUP_COLORS.values():
+        get_surface("rect", (20, 20), color)
+    for radius in range(31):
+        get_surface("ring", radius, ORANGE)
+
+@lru_cache(maxsize=128)
+def render_text(text, color, big=False):
+    # Text surfaces are only re-rendered when the string actually changes.
+    return (big_font if big else font).render(text, True, color)
+
 # =============================
 # CLASS DEFINITIONS
 # =============================
@@ -43,6 +141,7 @@ explosions = []
 class Tank:
     def __init__(self, x, y, color, controls, is_ai=False):
         self.pos = pygame.Vector2(x, y)
+        self.prev_pos = pygame.Vector2(x, y)  # position at the previous tick
         self.color = color
         self.controls = controls  # dictionary mapping actions to pygame key codes
         self.width = 40
@@ -58,11 +157,15 @@ class Tank:
         self.shot_cooldown = 500  # milliseconds delay between shots
         self.is_ai = is_ai
         self.in_bush = False  # For stealth: if inside a bush, becomes “invisible”
-        # Active power-ups stored as expiration times (or 0 if inactive)
-        self.active_powerups = {"speed": 0, "shield": 0, "damage": 0, "xp": 0}
+        # Active power-ups: the Timer that will expire each one (or None)
+        self.active_powerups = {"speed": None, "shield": None, "damage": None}
         self.damage = 20
         # Skill cooldown trackers (skills: "q", "e", "r")
         self.skill_cooldowns = {"q": 0, "e": 0, "r": 0}
+        # AI state: the current plan (see ai.py), when to replan, next skill volley
+        self.plan = None
+        self.next_plan = 0
+        self.next_skill = 0
 
     def handle_input(self, keys, current_time):
         # (AI tanks do not handle keyboard input)
@@ -82,7 +185,7 @@ class Tank:
         if move.length() > 0:
             move = move.normalize() * self.speed
             # Apply speed boost if active
-            if self.active_powerups["speed"] and current_time < self.active_powerups["speed"]:
+            if self.active_powerups["speed"]:
                 move *= 1.5
             self.pos += move
             self.direction = move.normalize()
@@ -102,10 +205,15 @@ class Tank:
         self.stay_in_bounds()
         # Determine if tank is hiding in any bush:
         self.in_bush = any(self.rect.colliderect(bush.rect) for bush in bushes)
-        # Expire power-ups if their time is up:
-        for key in ["speed", "shield", "damage", "xp"]:
-            if self.active_powerups[key] and current_time > self.active_powerups[key]:
-                self.active_powerups[key] = 0
+
+    def grant_powerup(self, kind):
+        # Picking up the same power-up again restarts its timer.
+        if self.active_powerups[kind]:
+            self.active_powerups[kind].cancel()
+        self.active_powerups[kind] = timers.schedule(POWERUP_TICKS, self.expire_powerup, kind)
+
+    def expire_powerup(self, kind):
+        self.active_powerups[kind] = None
 
     def stay_in_bounds(self):
         if self.pos.x < 0:
@@ -123,7 +231,7 @@ class Tank:
             return
         self.last_shot_time = current_time
         bullet_speed = 5
-        dmg_multiplier = 1.5 if self.active_powerups["damage"] and current_time < self.active_powerups["damage"] else 1
+        dmg_multiplier = 1.5 if self.active_powerups["damage"] else 1
         bullet = Bullet(self.pos + pygame.Vector2(self.width/2, self.height/2),
                         self.direction, bullet_speed, self.damage * dmg_multiplier, self)
         bullets.append(bullet)
@@ -155,24 +263,24 @@ class Tank:
         # Using a skill “breaks” stealth so the tank becomes visible
         self.in_bush = False
 
-    def draw(self, screen):
+    def draw(self, screen, blend=1.0):
+        # Draw between the last two ticks; blend=1.0 is the current position.
+        pos = self.prev_pos.lerp(self.pos, blend)
         # If in a bush (and not AI), draw with reduced opacity to simulate stealth
-        if self.in_bush and not self.is_ai:
-            s = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-            s.fill((self.color[0], self.color[1], self.color[2], 100))
-            screen.blit(s, (self.pos.x, self.pos.y))
-        else:
-            pygame.draw.rect(screen, self.color, self.rect)
+        alpha = 100 if self.in_bush and not self.is_ai else 255
+        body = screen.blit(get_surface("rect", (self.width, self.height), self.color, alpha), pos)
         # Draw a small health bar above the tank
         bar_width = self.width
         health_ratio = self.health / 100
-        pygame.draw.rect(screen, RED, (self.pos.x, self.pos.y - 10, bar_width, 5))
-        pygame.draw.rect(screen, GREEN, (self.pos.x, self.pos.y - 10, bar_width * health_ratio, 5))
+        bar = pygame.draw.rect(screen, RED, (pos.x, pos.y - 10, bar_width, 5))
+        pygame.draw.rect(screen, GREEN, (pos.x, pos.y - 10, bar_width * health_ratio, 5))
+        return body.union(bar)
 
 
 class Bullet:
     def __init__(self, pos, direction, speed, damage, owner, skill="normal"):
         self.pos = pygame.Vector2(pos)
+        self.prev_pos = pygame.Vector2(pos)
         self.direction = direction.normalize()
         self.speed = speed
         self.damage = damage
@@ -182,6 +290,7 @@ class Bullet:
         self.rect = pygame.Rect(self.pos.x, self.pos.y, self.radius*2, self.radius*2)
 
     def update(self):
+        self.prev_pos.update(self.pos)
         self.pos += self.direction * self.speed
         self.rect.topleft = (int(self.pos.x), int(self.pos.y))
         # Remove bullet if it goes off-screen
@@ -190,9 +299,11 @@ class Bullet:
             if self in bullets:
                 bullets.remove(self)
 
-    def draw(self, screen):
+    def draw(self, screen, blend=1.0):
+        pos = self.prev_pos.lerp(self.pos, blend)
         color = YELLOW if self.skill == "normal" else ORANGE
-        pygame.draw.circle(screen, color, (int(self.pos.x), int(self.pos.y)), self.radius)
+        sprite = get_surface("circle", self.radius, color)
+        return screen.blit(sprite, (int(pos.x) - self.radius, int(pos.y) - self.radius))
 
 
 class Obstacle:
@@ -201,7 +312,7 @@ class Obstacle:
         self.health = health
 
     def draw(self, screen):
-        pygame.draw.rect(screen, GREY, self.rect)
+        return pygame.draw.rect(screen, GREY, self.rect)
 
 
 class Bush:
@@ -209,9 +320,7 @@ class Bush:
         self.rect = pygame.Rect(x, y, width, height)
 
     def draw(self, screen):
-        s = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
-        s.fill((34, 139, 34, 150))
-        screen.blit(s, (self.rect.x, self.rect.y))
+        return screen.blit(get_surface("rect", self.rect.size, BUSH_GREEN, 150), self.rect)
 
 
 class PowerUp:
@@ -221,35 +330,25 @@ class PowerUp:
 
     def draw(self, screen):
         # Choose a color based on the type of power-up
-        if self.type == "speed":
-            color = BLUE
-        elif self.type == "shield":
-            color = (135, 206, 250)
-        elif self.type == "damage":
-            color = ORANGE
-        elif self.type == "health":
-            color = RED
-        elif self.type == "xp":
-            color = YELLOW
-        else:
-            color = WHITE
-        pygame.draw.rect(screen, color, self.rect)
+        color = POWERUP_COLORS.get(self.type, WHITE)
+        return screen.blit(get_surface("rect", self.rect.size, color), self.rect)
 
 
 class Explosion:
     def __init__(self, pos):
         self.pos = pygame.Vector2(pos)
-        self.timer = 30  # frames
+        self.born = timers.now
+        timers.schedule(EXPLOSION_TICKS, self.expire)
 
-    def update(self):
-        self.timer -= 1
-        if self.timer <= 0 and self in explosions:
+    def expire(self):
+        if self in explosions:
             explosions.remove(self)
 
     def draw(self, screen):
         # Draw an expanding circle to simulate an explosion effect
-        radius = max(0, 30 - self.timer)
-        pygame.draw.circle(screen, ORANGE, (int(self.pos.x), int(self.pos.y)), radius, 2)
+        radius = min(EXPLOSION_TICKS, timers.now - self.born)
+        sprite = get_surface("ring", radius, ORANGE)
+        return screen.blit(sprite, (int(self.pos.x) - radius, int(self.pos.y) - radius))
 
 
 # =============================
@@ -258,27 +357,47 @@ class Explosion:
 
 def ai_control(ai_tank, target_tank, current_time):
     """
-    A simple AI that:
-      - Moves toward the target tank.
-      - Shoots when the target is near.
-      - Occasionally uses skills.
+    An AI that (see ai.py):
+      - Replans every AI_PLAN_TICKS: raycasts for line of sight and picks
+        where to drive (closer, back off, or into a bush when hurt).
+      - Moves toward that goal every tick.
+      - Leads its shots from the target's velocity and fires only with a
+        clear line of sight, using skills every AI_SKILL_INTERVAL.
     """
-    direction = target_tank.pos - ai_tank.pos
-    if direction.length() != 0:
-        ai_tank.direction = direction.normalize()
-    # Move toward the player (scaled down so AI isn’t too perfect)
-    move_vector = ai_tank.direction * ai_tank.speed
-    ai_tank.pos += move_vector * 0.5
-    # If within a certain range, fire normally
-    if direction.length() < 300:
+    if ai_tank.plan is None or timers.now >= ai_tank.next_plan:
+        x, y = ai_tank.pos.x + ai_tank.width / 2, ai_tank.pos.y + ai_tank.height / 2
+        tx, ty = target_tank.rect.center
+        ai_tank.plan = ai.plan(x, y, ai_tank.health, tx, ty,
+                               [tuple(obs.rect) for obs in obstacles], [tuple(bush.rect) for bush in bushes])
+        # Move toward the goal (scaled down so AI isn’t too perfect)
+        ai_tank.plan["step"], ai_tank.plan["steps"] = ai.route(x, y, ai_tank.plan["goal"], ai_tank.speed * 0.5)
+        ai_tank.next_plan = timers.now + AI_PLAN_TICKS
+    plan = ai_tank.plan
+    if plan["steps"]:
+        plan["steps"] -= 1
+        ai_tank.pos.x += plan["step"][0]
+        ai_tank.pos.y += plan["step"][1]
+    if (plan["clear"] and plan["in_range"] and
+            current_time - ai_tank.last_shot_time >= ai_tank.shot_cooldown):
+        # Aim where the target will be; it moved pos - prev_pos this tick.
+        pos, target_pos, prev = ai_tank.pos, target_tank.pos, target_tank.prev_pos
+        angle = ai.lead_angle(pos.x + ai_tank.width / 2, pos.y + ai_tank.height / 2,
+                              target_pos.x + target_tank.width / 2, target_pos.y + target_tank.height / 2,
+                              target_pos.x - prev.x, target_pos.y - prev.y, 5)
+        ai_tank.direction.update(math.cos(angle), math.sin(angle))
         ai_tank.shoot(current_time)
-    # Occasionally use skills
-    if current_time % 2000 < 50:
-        ai_tank.use_skill("q", current_time)
-        if ai_tank.level >= 2:
-            ai_tank.use_skill("e", current_time)
-        if ai_tank.level >= 4:
-            ai_tank.use_skill("r", current_time)
+        if current_time >= ai_tank.next_skill:
+            ai_tank.next_skill = current_time + AI_SKILL_INTERVAL
+            ai_tank.use_skill("q", current_time)
+            if ai_tank.level >= 2:
+                ai_tank.use_skill("e", current_time)
+            if ai_tank.level >= 4:
+                ai_tank.use_skill("r", current_time)
+
+def grown_rect(rect, size):
+    # Rect grown up/left by a bullet's size: a bullet whose top-left corner
+    # is inside it overlaps the original rect.
+    return rect.x - size, rect.y - size, rect.width + size, rect.height + size
 
 def spawn_powerup():
     types = ["speed", "shield", "damage", "health", "xp"]
@@ -304,6 +423,80 @@ def spawn_bushes():
         y = random.randint(50, HEIGHT - 100)
         bushes.append(Bush(x, y, 60, 60))
 
+# =============================
+# RENDERING
+# =============================
+
+def invalidate_background():
+    # Called whenever the static terrain changes (an obstacle is destroyed).
+    global background
+    background = None
+
+def build_background():
+    # Pre-render the terrain that only changes when an obstacle is destroyed.
+    global background
+    background = pygame.Surface((WIDTH, HEIGHT)).convert()
+    background.fill(DARK_GREEN)
+    for obs in obstacles:
+        obs.draw(background)
+    for bush in bushes:
+        bush.draw(background)
+
+def draw_sprites(tanks, remaining_time, blend=1.0):
+    """Draw everything that moves plus the HUD and return the rects touched."""
+    rects = []
+    for powerup in powerups:
+        rects.append(powerup.draw(screen))
+    for tank in tanks:
+        rects.append(tank.draw(screen, blend))
+    for bullet in bullets:
+        rects.append(bullet.draw(screen, blend))
+    for explosion in explosions:
+        rects.append(explosion.draw(screen))
+
+    # UI overlay for each tank: lives, health, level and XP
+    for idx, tank in enumerate(tanks):
+        info = f"Player {idx+1}: Lives {tank.lives}  Health {tank.health}  Level {tank.level}  XP {tank.xp}"
+        info_text = render_text(info, WHITE)
+        rects.append(screen.blit(info_text, (10, 10 + idx * 20)))
+    # Draw the remaining game time (in seconds)
+    timer_text = render_text(f"Time Left: {remaining_time // 1000}s", WHITE)
+    rects.append(screen.blit(timer_text, (WIDTH - 150, 10)))
+    return rects
+
+def render_full(tanks, remaining_time, blend=1.0):
+    # Redraw the whole scene and flip the entire display.
+    screen.fill(DARK_GREEN)
+    for obs in obstacles:
+        obs.draw(screen)
+    for bush in bushes:
+        bush.draw(screen)
+    draw_sprites(tanks, remaining_time, blend)
+    pygame.display.flip()
+
+def render_dirty(tanks, remaining_time, blend=1.0):
+    # Erase last frame's sprites from the cached background, draw this frame's
+    # sprites and push only the union of old and new regions to the display.
+    global dirty_rects
+    screen_rect = screen.get_rect()
+    if background is None:
+        build_background()
+        screen.blit(background, (0, 0))
+        erased = [screen_rect]
+    else:
+        erased = dirty_rects
+        for rect in erased:
+            screen.blit(background, rect, rect)
+    drawn = [rect.clip(screen_rect) for rect in draw_sprites(tanks, remaining_time, blend)]
+    pygame.display.update(erased + drawn)
+    dirty_rects = drawn
+
+def render(tanks, remaining_time, blend=1.0):
+    if RENDER_MODE == "full":
+        render_full(tanks, remaining_time, blend)
+    else:
+        render_dirty(tanks, remaining_time, blend)
+
 # =============================
 # UI SCREENS: MAIN MENU & GAME OVER
 # =============================
@@ -313,11 +506,11 @@ def main_menu():
     selected_mode = None
     while menu:
         screen.fill(BLACK)
-        title_text = big_font.render("Pixel Tank Battle", True, WHITE)
-        pvp_text = font.render("1. Player vs Player", True, WHITE)
-        pve_text = font.render("2. Player vs AI", True, WHITE)
-        settings_text = font.render("3. Settings (Not Implemented)", True, WHITE)
-        quit_text = font.render("4. Quit", True, WHITE)
+        title_text = render_text("Pixel Tank Battle", WHITE, big=True)
+        pvp_text = render_text("1. Player vs Player", WHITE)
+        pve_text = render_text("2. Player vs AI", WHITE)
+        settings_text = render_text("3. Play Online", WHITE)
+        quit_text = render_text("4. Quit", WHITE)
         screen.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, 100))
         screen.blit(pvp_text, (WIDTH // 2 - pvp_text.get_width() // 2, 200))
         screen.blit(pve_text, (WIDTH // 2 - pve_text.get_width() // 2, 250))
@@ -335,6 +528,9 @@ def main_menu():
                 elif event.key == pygame.K_2:
                     selected_mode = "pve"
                     menu = False
+                elif event.key == pygame.K_3:
+                    selected_mode = "online"
+                    menu = False
                 elif event.key == pygame.K_4:
                     pygame.quit()
                     sys.exit()
@@ -345,9 +541,9 @@ def game_over(winner_text):
     over = True
     while over:
         screen.fill(BLACK)
-        over_text = big_font.render("Game Over!", True, RED)
-        winner_display = font.render(winner_text, True, WHITE)
-        menu_text = font.render("Press M to return to Main Menu", True, WHITE)
+        over_text = render_text("Game Over!", RED, big=True)
+        winner_display = render_text(winner_text, WHITE)
+        menu_text = render_text("Press M to return to Main Menu", WHITE)
         screen.blit(over_text, (WIDTH // 2 - over_text.get_width() // 2, 150))
         screen.blit(winner_display, (WIDTH // 2 - winner_display.get_width() // 2, 220))
         screen.blit(menu_text, (WIDTH // 2 - menu_text.get_width() // 2, 300))
@@ -361,24 +557,103 @@ def game_over(winner_text):
                     over = False
         clock.tick(FPS)
 
+# =============================
+# SIMULATION
+# =============================
+
+def simulate_tick(tanks, keys, current_time):
+    """Advance the world by one fixed logical tick (1 / SIM_RATE seconds)."""
+    # Fire whatever timed events are due this tick
+    timers.advance()
+    for tank in tanks:
+        tank.prev_pos.update(tank.pos)
+
+    # Process input (or AI logic) for each tank:
+    for tank in tanks:
+        if not tank.is_ai:
+            tank.handle_input(keys, current_time)
+        else:
+            # In PvE, AI always targets player1.
+            ai_control(tank, tanks[0], current_time)
+    for tank in tanks:
+        tank.update(current_time)
+
+    # Update bullets and handle collisions:
+    for bullet in bullets[:]:
+        bullet.update()
+        # Sweep the bullet's box along this tick's path and resolve only the
+        # first thing it touched. Growing each target by the bullet size makes
+        # the segment test match the old rect-overlap test at any speed.
+        size = bullet.radius * 2
+        x0, y0, x1, y1 = bullet.prev_pos.x, bullet.prev_pos.y, bullet.pos.x, bullet.pos.y
+        t_obs, obs = first_hit(x0, y0, x1, y1, obstacles, lambda o: grown_rect(o.rect, size))
+        t_tank, tank = first_hit(x0, y0, x1, y1, [t for t in tanks if t != bullet.owner],
+                                 lambda t: grown_rect(t.rect, size))
+        if obs is not None and (tank is None or t_obs <= t_tank):
+            # Hit destructible terrain
+            obs.health -= bullet.damage
+            if obs.health <= 0:
+                obstacles.remove(obs)
+                explosions.append(Explosion(obs.rect.center))
+                invalidate_background()
+            if bullet in bullets:
+                bullets.remove(bullet)
+        elif tank is not None:
+            # Hit a tank (never the bullet’s owner)
+            if tank.active_powerups["shield"]:
+                # Shield power-up negates damage
+                pass
+            else:
+                tank.health -= bullet.damage
+            if tank.health <= 0:
+                tank.lives -= 1
+                tank.health = 100  # Reset health on respawn
+                bullet.owner.xp += 20
+                # Level-up: each level requires more XP (here, level × 100 XP)
+                if bullet.owner.xp >= 100 * bullet.owner.level:
+                    bullet.owner.level += 1
+                    bullet.owner.damage += 5  # Increase damage with each level
+            if bullet in bullets:
+                bullets.remove(bullet)
+
+    # Check for collisions with power-ups:
+    for powerup in powerups[:]:
+        for tank in tanks:
+            if tank.rect.colliderect(powerup.rect):
+                if powerup.type in ("speed", "shield", "damage"):
+                    tank.grant_powerup(powerup.type)  # lasts 5 seconds
+                elif powerup.type == "health":
+                    tank.health = min(100, tank.health + 30)
+                elif powerup.type == "xp":
+                    tank.xp += 30
+                    if tank.xp >= 100 * tank.level:
+                        tank.level += 1
+                        tank.damage += 5
+                powerups.remove(powerup)
+                break
+
 # =============================
 # MAIN GAME LOOP
 # =============================
 
-def game_loop(mode):
+def game_loop(mode, max_ticks=None):
     # Reset global objects
-    global bullets, obstacles, bushes, powerups, explosions
+    global bullets, obstacles, bushes, powerups, explosions, dirty_rects, timers
     bullets = []
     obstacles = []
     bushes = []
     powerups = []
     explosions = []
+    dirty_rects = []
+    timers = TimerWheel()
+    invalidate_background()
+    build_atlas()
 
     # Spawn initial obstacles, bushes, and a power-up
     spawn_obstacles()
     spawn_bushes()
     spawn_powerup()
-    powerup_spawn_timer = pygame.time.get_ticks() + 5000  # new power-up every 5 seconds
+    timers.every(POWERUP_INTERVAL, spawn_powerup)
 
     # Create tanks with distinct controls.
     # For Player 1 (blue): use WASD for movement, SPACE for shooting, and Q/E/R for skills.
@@ -416,124 +691,60 @@ def game_loop(mode):
 
     # Set a game duration of 10 minutes (600,000 milliseconds)
     game_duration = 10 * 60 * 1000
-    start_time = pygame.time.get_ticks()
+    remaining_time = game_duration
+    # Fixed-timestep state: real frame time is banked in the accumulator and
+    # spent in whole simulation ticks; what's left over blends the render.
+    tick = 0
+    step_ms = 1000 / SIM_RATE
+    accumulator = 0.0
+    clock.tick()
+    # Render cost, reported at the end of the match to compare render modes
+    wall_start = time.perf_counter()
+    render_frames = 0
+    render_cpu = 0.0
 
     running = True
     while running:
-        current_time = pygame.time.get_ticks()
-        elapsed_time = current_time - start_time
-        remaining_time = max(0, game_duration - elapsed_time)
-
-        # End the match if time runs out or a tank loses all lives.
-        if remaining_time <= 0 or any(tank.lives <= 0 for tank in tanks):
-            running = False
-
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
 
         keys = pygame.key.get_pressed()
-        # Process input (or AI logic) for each tank:
-        for tank in tanks:
-            if not tank.is_ai:
-                tank.handle_input(keys, current_time)
-            else:
-                # In PvE, AI always targets player1.
-                ai_control(tank, player1, current_time)
-        for tank in tanks:
-            tank.update(current_time)
-
-        # Update bullets and handle collisions:
-        for bullet in bullets[:]:
-            bullet.update()
-            # Check collision with obstacles (destructible terrain)
-            for obs in obstacles[:]:
-                if bullet.rect.colliderect(obs.rect):
-                    obs.health -= bullet.damage
-                    if obs.health <= 0:
-                        obstacles.remove(obs)
-                        explosions.append(Explosion(obs.rect.center))
-                    if bullet in bullets:
-                        bullets.remove(bullet)
-                    break
-            # Check collision with tanks (but not the bullet’s owner)
-            for tank in tanks:
-                if tank != bullet.owner and bullet.rect.colliderect(tank.rect):
-                    if tank.active_powerups["shield"] and current_time < tank.active_powerups["shield"]:
-                        # Shield power-up negates damage
-                        pass
-                    else:
-                        tank.health -= bullet.damage
-                    if tank.health <= 0:
-                        tank.lives -= 1
-                        tank.health = 100  # Reset health on respawn
-                        bullet.owner.xp += 20
-                        # Level-up: each level requires more XP (here, level × 100 XP)
-                        if bullet.owner.xp >= 100 * bullet.owner.level:
-                            bullet.owner.level += 1
-                            bullet.owner.damage += 5  # Increase damage with each level
-                    if bullet in bullets:
-                        bullets.remove(bullet)
-                    break
-
-        # Update explosions
-        for explosion in explosions[:]:
-            explosion.update()
-
-        # Check for collisions with power-ups:
-        for powerup in powerups[:]:
-            for tank in tanks:
-                if tank.rect.colliderect(powerup.rect):
-                    if powerup.type == "speed":
-                        tank.active_powerups["speed"] = current_time + 5000  # lasts 5 seconds
-                    elif powerup.type == "shield":
-                        tank.active_powerups["shield"] = current_time + 5000
-                    elif powerup.type == "damage":
-                        tank.active_powerups["damage"] = current_time + 5000
-                    elif powerup.type == "health":
-                        tank.health = min(100, tank.health + 30)
-                    elif powerup.type == "xp":
-                        tank.xp += 30
-                        if tank.xp >= 100 * tank.level:
-                            tank.level += 1
-                            tank.damage += 5
-                    powerups.remove(powerup)
-                    break
-
-        # Spawn new power-ups periodically
-        if current_time > powerup_spawn_timer:
-            spawn_powerup()
-            powerup_spawn_timer = current_time + 5000
+        if FAST_FORWARD:
+            accumulator += step_ms
+        else:
+            accumulator += min(clock.tick(MAX_RENDER_FPS), MAX_FRAME_MS)
+
+        while running and accumulator >= step_ms:
+            current_time = tick * 1000 // SIM_RATE
+            simulate_tick(tanks, keys, current_time)
+            tick += 1
+            accumulator -= step_ms
+            remaining_time = max(0, game_duration - tick * 1000 // SIM_RATE)
+            # End the match if time runs out or a tank loses all lives.
+            if remaining_time <= 0 or any(tank.lives <= 0 for tank in tanks):
+                running = False
+            if max_ticks is not None and tick >= max_ticks:
+                running = False
+
+        if FAST_FORWARD:
+            continue
 
         # =============================
         # DRAWING
         # =============================
-        screen.fill(DARK_GREEN)
-        for obs in obstacles:
-            obs.draw(screen)
-        for bush in bushes:
-            bush.draw(screen)
-        for powerup in powerups:
-            powerup.draw(screen)
-        for tank in tanks:
-            tank.draw(screen)
-        for bullet in bullets:
-            bullet.draw(screen)
-        for explosion in explosions:
-            explosion.draw(screen)
-
-        # UI overlay for each tank: lives, health, level and XP
-        for idx, tank in enumerate(tanks):
-            info = f"Player {idx+1}: Lives {tank.lives}  Health {tank.health}  Level {tank.level}  XP {tank.xp}"
-            info_text = font.render(info, True, WHITE)
-            screen.blit(info_text, (10, 10 + idx * 20))
-        # Draw the remaining game time (in seconds)
-        timer_text = font.render(f"Time Left: {remaining_time // 1000}s", True, WHITE)
-        screen.blit(timer_text, (WIDTH - 150, 10))
-
-        pygame.display.flip()
-        clock.tick(FPS)
+        cpu_start = time.process_time()
+        render(tanks, remaining_time, accumulator / step_ms)
+        render_cpu += time.process_time() - cpu_start
+        render_frames += 1
+
+    elapsed_s = time.perf_counter() - wall_start
+    if render_frames:
+        print(f"Render mode {RENDER_MODE}: {render_frames / elapsed_s:.1f} FPS, "
+              f"{render_cpu / render_frames * 1000:.2f} ms CPU per frame")
+    else:
+        print(f"Simulated {tick} ticks in {elapsed_s:.2f}s ({tick / elapsed_s:.0f} ticks/s)")
 
     # =============================
     # DETERMINE & SHOW WINNER
@@ -544,12 +755,131 @@ def game_loop(mode):
         winner_text = "Player 2 Wins!"
     else:
         winner_text = "It's a Draw!"
-    game_over(winner_text)
+    if FAST_FORWARD:
+        print(winner_text)
+    else:
+        game_over(winner_text)
+    return winner_text
+
+# =============================
+# NETWORK PLAY
+# =============================
+
+def render_network(client, blend):
+    view = client.view()
+    me_pos = client.local_position(blend)
+    # Follow our tank when the world is bigger than the screen.
+    cam_x = cam_y = 0
+    if me_pos is not None:
+        cam_x = max(0, min(me_pos[0] + 20 - WIDTH / 2, client.world['width'] - WIDTH))
+        cam_y = max(0, min(me_pos[1] + 20 - HEIGHT / 2, client.world['height'] - HEIGHT))
+
+    screen.fill(DARK_GREEN)
+    if view is None:
+        waiting = render_text("Searching for a match...", WHITE)
+        screen.blit(waiting, (WIDTH // 2 - waiting.get_width() // 2, HEIGHT // 2))
+        pygame.display.flip()
+        return
+    for obs in view.get('obstacles', []):
+        screen.blit(get_surface("rect", (obs['width'], obs['height']), GREY), (obs['x'] - cam_x, obs['y'] - cam_y))
+    for bush in view.get('bushes', []):
+        screen.blit(get_surface("rect", (bush['width'], bush['height']), BUSH_GREEN, 150),
+                    (bush['x'] - cam_x, bush['y'] - cam_y))
+    for power in view.get('powerups', []):
+        color = POWERUP_COLORS.get(power['type'], WHITE)
+        screen.blit(get_surface("rect", (power['width'], power['height']), color), (power['x'] - cam_x, power['y'] - cam_y))
+    for player in view.get('players', []):
+        if not player.get('alive', True):
+            continue  # waiting to respawn
+        if client.me is not None and player['sid'] == client.me['sid'] and me_pos is not None:
+            x, y = me_pos
+        else:
+            x, y = player['x'], player['y']
+        color = BLUE if player.get('team') == 'blue' else RED
+        screen.blit(get_surface("rect", (40, 40), color), (x - cam_x, y - cam_y))
+        pygame.draw.rect(screen, RED, (x - cam_x, y - cam_y - 10, 40, 5))
+        pygame.draw.rect(screen, GREEN, (x - cam_x, y - cam_y - 10, 40 * max(0, player['health']) / 100, 5))
+    for bullet in view.get('bullets', []):
+        color = YELLOW if bullet.get('skill') is None else ORANGE
+        screen.blit(get_surface("circle", 5, color), (int(bullet['x'] - cam_x) - 5, int(bullet['y'] - cam_y) - 5))
+    for progress, event in client.active_effects():
+        x, y = int(event['x'] - cam_x), int(event['y'] - cam_y)
+        if event['type'] in ('explosion', 'hit'):
+            radius = max(1, int((30 if event['type'] == 'explosion' else 12) * progress))
+            screen.blit(get_surface("ring", radius, ORANGE if event['type'] == 'explosion' else WHITE), (x - radius, y - radius))
+        else:
+            label = f"LEVEL {event['level']}!" if event['type'] == 'level_up' else event['kind'].upper()
+            screen.blit(render_text(label, YELLOW), (x, y - int(20 * progress)))
+
+    for idx, player in enumerate(view.get('players', [])):
+        info = f"{player['name']}: Lives {player['lives']}  Health {player['health']}  Level {player['level']}  XP {player['xp']}"
+        screen.blit(render_text(info, WHITE), (10, 10 + idx * 20))
+    timer_text = render_text(f"Time Left: {int(view.get('time_left', 0))}s", WHITE)
+    screen.blit(timer_text, (WIDTH - 150, 10))
+    pygame.display.flip()
+
+def network_game_loop(mode):
+    """
+    Play on the app.py server. Our tank is predicted locally every simulation
+    tick; everyone else is interpolated from server snapshots.
+    """
+    client = NetClient(SERVER_URL, PLAYER_NAME, mode)
+    try:
+        client.connect()
+    except Exception as exc:
+        game_over(f"Could not connect to {SERVER_URL}: {exc}")
+        return
+
+    step_ms = 1000 / SIM_RATE
+    accumulator = 0.0
+    angle = 0.0
+    clock.tick()
+    while client.winner is None and client.error is None:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                client.close()
+                pygame.quit()
+                sys.exit()
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_q, pygame.K_e, pygame.K_r):
+                client.skill(pygame.key.name(event.key), angle)
+
+        keys = pygame.key.get_pressed()
+        me_pos = client.local_position()
+        if me_pos is not None:
+            # Aim at the mouse, as in the browser client.
+            cam_x = max(0, min(me_pos[0] + 20 - WIDTH / 2, client.world['width'] - WIDTH))
+            cam_y = max(0, min(me_pos[1] + 20 - HEIGHT / 2, client.world['height'] - HEIGHT))
+            mouse_x, mouse_y = pygame.mouse.get_pos()
+            angle = math.atan2(mouse_y + cam_y - me_pos[1] - 20, mouse_x + cam_x - me_pos[0] - 20)
+
+        accumulator += min(clock.tick(MAX_RENDER_FPS), MAX_FRAME_MS)
+        while accumulator >= step_ms:
+            move_x = keys[pygame.K_d] - keys[pygame.K_a]
+            move_y = keys[pygame.K_s] - keys[pygame.K_w]
+            client.predict(move_x, move_y, angle)
+            if keys[pygame.K_SPACE] or pygame.mouse.get_pressed()[2]:
+                client.shoot(angle)
+            accumulator -= step_ms
+
+        render_network(client, accumulator / step_ms)
+
+    client.close()
+    game_over(f"Winner: {client.winner}" if client.winner is not None else client.error)
 
 # =============================
 # MAIN PROGRAM LOOP
 # =============================
 
-while True:
-    mode = main_menu()
-    game_loop(mode)
+if __name__ == "__main__":
+    if FAST_FORWARD:
+        # Headless run: one match straight through, e.g.
+        #   SDL_VIDEODRIVER=dummy TANK_FAST_FORWARD=1 TANK_TICKS=3600 python game.py
+        ticks = os.environ.get("TANK_TICKS")
+        game_loop(os.environ.get("TANK_MODE", "pve"), int(ticks) if ticks else None)
+        sys.exit()
+    while True:
+        mode = main_menu()
+        if mode == "online":
+            network_game_loop(NET_MODE)
+        else:
+            game_loop(mode)
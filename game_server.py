@@ -0,0 +1,724 @@
+"""
+Server-side game logic shared by the Socket.IO backends: app.py (Flask +
+eventlet) and app_async.py (python-socketio AsyncServer under ASGI).
+
+A GameRoom owns one match. The backend calls its handler methods with the
+sender's sid and calls tick() from its background loop; anything the room
+wants to send is queued as (event, data, to) in room.outbox, and the backend
+drains and emits it afterwards. Nothing here touches the network or blocks.
+Rooms are created by matchmaking.Lobby, and a room's broadcasts go to the
+Socket.IO room named by its room_id.
+"""
+import itertools
+import json
+import math
+import os
+import random
+import time
+from collections import deque
+
+import ai
+from collision import first_hit
+from scheduler import TimerWheel
+from world import CHUNK_SIZE, World
+
+# Game settings
+CANVAS_WIDTH = 800
+CANVAS_HEIGHT = 600
+GAME_DURATION = 10 * 60  # in seconds (10 minutes)
+# Tick rate. Per-tick speeds and timers are tuned for BASE_TICK_RATE and
+# scaled by TICK_SCALE, and bullet hits are swept along each tick's path, so
+# a room can run slower (e.g. TANK_TICK_RATE=10) with the same gameplay.
+BASE_TICK_RATE = 20
+TICK_RATE = int(os.environ.get('TANK_TICK_RATE', BASE_TICK_RATE))
+TICK_INTERVAL = 1 / TICK_RATE            # seconds between ticks
+TICK_SCALE = BASE_TICK_RATE / TICK_RATE  # per-tick movement multiplier
+
+# Large-world mode: the arena is many screens wide, its terrain is generated
+# in chunks on first access, and each client is only streamed the chunks
+# around its own viewport instead of the whole map every tick.
+LARGE_WORLD = os.environ.get('TANK_LARGE_WORLD', '0') == '1'
+WORLD_WIDTH = int(os.environ.get('TANK_WORLD_WIDTH', CANVAS_WIDTH * 10)) if LARGE_WORLD else CANVAS_WIDTH
+WORLD_HEIGHT = int(os.environ.get('TANK_WORLD_HEIGHT', CANVAS_HEIGHT * 10)) if LARGE_WORLD else CANVAS_HEIGHT
+WORLD_SEED = int(os.environ.get('TANK_WORLD_SEED', random.randint(0, 2**31)))
+VIEW_MARGIN = 200       # extra distance streamed around each viewport
+POWERUPS_PER_PLAYER = 3  # power-ups kept around each player in large-world mode
+SPAWN_MIN_DISTANCE = 200  # large world: tanks spawn this far or more from an opponent
+
+# Timed events (seconds, converted to ticks with ticks())
+POWERUP_DURATION = 5     # speed / shield power-ups
+POWERUP_INTERVAL = 5     # between power-up spawns
+RESPAWN_DELAY = 2
+SHOT_COOLDOWN = 0.5
+SKILL_COOLDOWNS = {'q': 1.0, 'e': 1.5, 'r': 2.0}
+AI_SHOT_COOLDOWN = 1.0
+
+# Spectators get a delayed, low-rate copy of the match. Each frame is
+# serialized once and the same string is sent to every spectator.
+SPECTATOR_RATE = 5   # frames per second
+SPECTATOR_DELAY = 2  # seconds behind the live match
+
+bullet_ids = itertools.count(1)  # stable ids so clients can interpolate bullets
+
+
+def ticks(seconds):
+    return max(1, round(seconds * TICK_RATE))
+
+
+def rand_int(low, high):
+    # random.randint without its argument checks, several times cheaper.
+    # A room's terrain takes dozens of these on its first tick.
+    return low + int(random.random() * (high - low + 1))
+
+
+def view_rect(player):
+    # Area streamed to a player: their screen centred on the tank plus a margin.
+    return (player['x'] + 20 - CANVAS_WIDTH / 2 - VIEW_MARGIN,
+            player['y'] + 20 - CANVAS_HEIGHT / 2 - VIEW_MARGIN,
+            CANVAS_WIDTH + 2 * VIEW_MARGIN,
+            CANVAS_HEIGHT + 2 * VIEW_MARGIN)
+
+def in_rect(obj, rect):
+    x, y, w, h = rect
+    return x <= obj['x'] <= x + w and y <= obj['y'] <= y + h
+
+def tank_box(p):
+    return p['x'], p['y'], 40, 40
+
+def obstacle_box(obs):
+    return obs['x'], obs['y'], obs['width'], obs['height']
+
+
+class GameRoom:
+    def __init__(self, room_id=None):
+        self.room_id = room_id  # Socket.IO room for broadcasts (None: everyone)
+        self.results = None     # humans' final stats once the match is over
+        self.spectator_room = f"{room_id}:spectators"
+        self.spectators = set()  # sids watching, managed by the lobby
+        self.outbox = []  # (event, data, to) waiting for the backend to send
+        self.timers = TimerWheel()  # timed events, driven by tick()
+        self.reset_game()
+
+    # -------------------------------
+    # OUTGOING MESSAGES
+    # -------------------------------
+    def emit(self, event, data, to=None):
+        self.outbox.append((event, data, self.room_id if to is None else to))
+
+    def drain(self):
+        messages = self.outbox
+        self.outbox = []
+        return messages
+
+    def event(self, name, x, y, **fields):
+        # One-shot effects (explosions, hits, pickups, level-ups) are batched
+        # per tick and sent once; clients play them locally.
+        fields.update(type=name, x=x, y=y)
+        self.events.append(fields)
+
+    def flush_events(self, now):
+        if not self.events:
+            return
+        batch, self.events = self.events, []
+        if self.world is None:
+            self.emit('events', {'events': batch, 'server_time': now})
+            return
+        # Large world: each human only hears about what happens in their view.
+        for sid, p in self.players.items():
+            if p.get('mode') != 'human':
+                continue
+            rect = view_rect(p)
+            nearby = [e for e in batch if in_rect(e, rect)]
+            if nearby:
+                self.emit('events', {'events': nearby, 'server_time': now}, to=sid)
+
+    # -------------------------------
+    # HELPER FUNCTIONS
+    # -------------------------------
+    def spawn_obstacles(self):
+        self.obstacles = []
+        for _ in range(5):
+            x = rand_int(100, CANVAS_WIDTH - 150)
+            y = rand_int(100, CANVAS_HEIGHT - 150)
+            width = rand_int(40, 100)
+            height = rand_int(40, 100)
+            self.obstacles.append({
+                'x': x,
+                'y': y,
+                'width': width,
+                'height': height,
+                'health': 50
+            })
+
+    def spawn_bushes(self):
+        self.bushes = []
+        for _ in range(4):
+            x = rand_int(50, CANVAS_WIDTH - 100)
+            y = rand_int(50, CANVAS_HEIGHT - 100)
+            self.bushes.append({
+                'x': x,
+                'y': y,
+                'width': 60,
+                'height': 60
+            })
+
+    def spawn_powerup(self, near=None):
+        types = ["speed", "shield", "damage", "health", "xp"]
+        p_type = random.choice(types)
+        if near is not None:
+            # Large world: drop the power-up somewhere inside the player's view.
+            x = int(min(max(50, near['x'] + rand_int(-CANVAS_WIDTH // 2, CANVAS_WIDTH // 2)), WORLD_WIDTH - 50))
+            y = int(min(max(50, near['y'] + rand_int(-CANVAS_HEIGHT // 2, CANVAS_HEIGHT // 2)), WORLD_HEIGHT - 50))
+        else:
+            x = rand_int(50, CANVAS_WIDTH - 50)
+            y = rand_int(50, CANVAS_HEIGHT - 50)
+        powerup = {
+            'x': x,
+            'y': y,
+            'width': 20,
+            'height': 20,
+            'type': p_type,
+            'duration': 5000  # effect duration (handled client‐side)
+        }
+        self.powerups.append(powerup)
+
+    def spawn_powerups(self):
+        if not LARGE_WORLD:
+            self.spawn_powerup()
+            return
+        humans = [p for p in self.players.values() if p.get('mode') == 'human']
+        views = [view_rect(p) for p in humans]
+        # Drop the ones nobody can see any more, so a player crossing the map
+        # doesn't leave a trail of them behind.
+        self.powerups = [pw for pw in self.powerups if any(in_rect(pw, rect) for rect in views)]
+        for p, rect in zip(humans, views):
+            nearby = [pw for pw in self.powerups if in_rect(pw, rect)]
+            if len(nearby) < POWERUPS_PER_PLAYER:
+                self.spawn_powerup(near=p)
+
+    def spawn_point(self, mode, exclude=None):
+        # Anywhere in the classic arena. In a large world, on the screen of a
+        # live opponent (a human for the AI, anyone for a human) so tanks
+        # don't spend minutes crossing the map to find each other.
+        others = [o for o in self.players.values() if o is not exclude and o['alive'] and
+                  (mode == 'human' or o.get('mode') == 'human')]
+        if not LARGE_WORLD or not others:
+            return random.randint(0, WORLD_WIDTH - 40), random.randint(0, WORLD_HEIGHT - 40)
+        other = random.choice(others)
+        angle = random.uniform(0, 2 * math.pi)
+        distance = random.uniform(SPAWN_MIN_DISTANCE, CANVAS_HEIGHT / 2)
+        x = other['x'] + math.cos(angle) * distance
+        y = other['y'] + math.sin(angle) * distance
+        return int(min(max(0, x), WORLD_WIDTH - 40)), int(min(max(0, y), WORLD_HEIGHT - 40))
+
+    def spawn_terrain(self):
+        if LARGE_WORLD:
+            self.start_world()
+        else:
+            self.spawn_obstacles()
+            self.spawn_bushes()
+        self.spawn_powerups()
+
+    def obstacles_along(self, x0, y0, x1, y1):
+        # Obstacles that a bullet moving from (x0, y0) to (x1, y1) could touch.
+        # In large-world mode only the chunks under that segment can hold one;
+        # the classic arena just checks them all.
+        if self.world is not None:
+            return self.world.obstacles_near(min(x0, x1), min(y0, y1), abs(x1 - x0), abs(y1 - y0))
+        return self.obstacles
+
+    def damage_obstacle(self, obs, damage):
+        if self.world is not None:
+            return self.world.damage_obstacle(obs, damage)
+        obs['health'] -= damage
+        if obs['health'] <= 0:
+            self.obstacles.remove(obs)
+            return True
+        return False
+
+    def stream_chunks(self, sid, player):
+        """
+        Send the player any chunks that entered their view or changed since
+        they were last sent, and tell them which ones they can drop.
+        """
+        known = self.client_chunks.setdefault(sid, {})
+        visible = self.world.chunk_keys_in_rect(*view_rect(player))
+        send = []
+        for key in visible:
+            chunk = self.world.get_chunk(*key)
+            if known.get(key) != chunk['version']:
+                send.append(self.world.serialize_chunk(key))
+                known[key] = chunk['version']
+        drop = [key for key in known if key not in visible]
+        for key in drop:
+            del known[key]
+        if send or drop:
+            self.emit('world_chunks', {'chunks': send, 'drop': drop}, to=sid)
+        return visible
+
+    def start_world(self):
+        self.world = World(WORLD_WIDTH, WORLD_HEIGHT, WORLD_SEED)
+        self.client_chunks.clear()
+
+    def update_lobby(self):
+        self.emit('lobby_update', list(self.players.values()))
+
+    # -------------------------------
+    # SOCKET.IO EVENT HANDLERS
+    # -------------------------------
+    def handle_join(self, sid, data):
+        name = data.get('name', 'Player')
+        mode = data.get('mode', 'pve')  # default to PvE
+        self.game_mode = mode
+        # Initialize player properties
+        x, y = self.spawn_point('human')
+        self.players[sid] = {
+            'sid': sid,
+            'name': name,
+            'x': x,
+            'y': y,
+            'angle': 0,
+            'health': 100,
+            'lives': 3,
+            'xp': 0,
+            'level': 1,
+            'damage': 20,
+            'speed': 3,
+            'mode': 'human',  # human-controlled
+            'last_shot': -ticks(SHOT_COOLDOWN),  # tick of the last shot
+            'cooldowns': {k: -ticks(v) for k, v in SKILL_COOLDOWNS.items()},
+            'inBush': False,
+            'alive': True,
+            'shield': False,
+            'team': 'blue',  # For PvP you might assign teams differently
+            'last_seq': 0,  # last player_update sequence number applied
+            'spawn': 0      # bumped whenever the server moves the tank itself
+        }
+        self.emit('joined', self.players[sid], to=sid)
+        self.emit('world_info', {
+            'width': WORLD_WIDTH,
+            'height': WORLD_HEIGHT,
+            'large': LARGE_WORLD,
+            'chunk_size': CHUNK_SIZE if LARGE_WORLD else None
+        }, to=sid)
+        self.update_lobby()
+        print(f"{name} joined as {sid} in mode {mode}")
+        # If playing versus computer, spawn an AI tank if none exists
+        if mode == 'pve':
+            ai_exists = any(p for p in self.players.values() if p.get('mode') == 'ai')
+            if not ai_exists:
+                self.spawn_ai()
+
+        # Start the game if not already active.
+        if not self.game_active:
+            self.start_tick = self.timers.now
+            self.game_active = True
+            self.timers.every(ticks(POWERUP_INTERVAL), self.spawn_powerups)
+            self.timers.schedule(ticks(GAME_DURATION), self.end_game)
+            # Terrain waits for the first tick so that creating a room stays
+            # cheap when matchmaking starts hundreds of them at once.
+            self.timers.schedule(1, self.spawn_terrain)
+
+    def handle_player_update(self, sid, data):
+        players = self.players
+        if sid in players and players[sid]['alive']:
+            # Updates sent before the client saw a server-side respawn would
+            # drag the tank back to where it died, so drop them.
+            if data.get('spawn', players[sid]['spawn']) != players[sid]['spawn']:
+                return
+            players[sid]['x'] = data.get('x', players[sid]['x'])
+            players[sid]['y'] = data.get('y', players[sid]['y'])
+            players[sid]['angle'] = data.get('angle', players[sid]['angle'])
+            players[sid]['last_seq'] = data.get('seq', players[sid]['last_seq'])
+
+    def handle_shoot(self, sid, data):
+        now = self.timers.now
+        player = self.players.get(sid)
+        if not player or not player['alive']:
+            return
+        # Enforce a 500ms shot cooldown
+        if now - player['last_shot'] < ticks(SHOT_COOLDOWN):
+            return
+        player['last_shot'] = now
+        bullet = {
+            'id': next(bullet_ids),
+            'x': data.get('x', player['x']+20),
+            'y': data.get('y', player['y']+20),
+            'angle': data.get('angle', player['angle']),
+            'speed': 5,
+            'damage': player['damage'],
+            'owner': sid,
+            'skill': None
+        }
+        self.bullets.append(bullet)
+        print(f"{player['name']} fired a bullet.")
+
+    def handle_skill(self, sid, data):
+        player = self.players.get(sid)
+        if not player or not player['alive']:
+            return
+        skill = data.get('skill', 'q')
+        now = self.timers.now
+        # Skill cooldowns: q=1000ms, e=1500ms, r=2000ms
+        if skill not in SKILL_COOLDOWNS or now - player['cooldowns'][skill] < ticks(SKILL_COOLDOWNS[skill]):
+            return
+        player['cooldowns'][skill] = now
+        # Skill bullet: faster and more damaging (with multipliers)
+        bullet = {
+            'id': next(bullet_ids),
+            'x': data.get('x', player['x']+20),
+            'y': data.get('y', player['y']+20),
+            'angle': data.get('angle', player['angle']),
+            'speed': 7,
+            'damage': player['damage'] * (1.5 if skill=='e' else (2.5 if skill=='r' else 1)),
+            'owner': sid,
+            'skill': skill
+        }
+        self.bullets.append(bullet)
+        print(f"{player['name']} used skill {skill}.")
+
+    def handle_chat(self, sid, data):
+        player = self.players.get(sid, {})
+        name = player.get('name', 'Unknown')
+        timestamp = int(time.time())
+        msg = {
+            'sid': sid,
+            'name': name,
+            'message': data.get('message', ''),
+            'timestamp': timestamp
+        }
+        self.emit('chat', msg)
+
+    def handle_disconnect(self, sid):
+        if sid in self.players:
+            print(f"{self.players[sid]['name']} disconnected.")
+            del self.players[sid]
+        for key in [key for key in self.powerup_timers if key[0] == sid]:
+            self.powerup_timers.pop(key).cancel()
+        self.client_chunks.pop(sid, None)
+        self.update_lobby()
+
+    # -------------------------------
+    # AI
+    # -------------------------------
+    def spawn_ai(self):
+        # Create an AI-controlled tank with slightly lower stats
+        ai_id = "AI_" + str(random.randint(1000,9999))
+        x, y = self.spawn_point('ai')
+        self.players[ai_id] = {
+            'sid': ai_id,
+            'name': "Computer",
+            'x': x,
+            'y': y,
+            'angle': 0,
+            'health': 100,
+            'lives': 3,
+            'xp': 0,
+            'level': 1,
+            'damage': 18,   # a bit lower than the human
+            'speed': 2.5,
+            'mode': 'ai',
+            'last_shot': -ticks(SHOT_COOLDOWN),  # tick of the last shot
+            'cooldowns': {k: -ticks(v) for k, v in SKILL_COOLDOWNS.items()},
+            'inBush': False,
+            'alive': True,
+            'shield': False,
+            'team': 'red',
+            'last_seq': 0,  # last player_update sequence number applied
+            'spawn': 0      # bumped whenever the server moves the tank itself
+        }
+        # Stagger the first plan so AI tanks don't all plan on the same tick.
+        self.timers.schedule(random.randint(1, ticks(ai.PLAN_INTERVAL)), self.plan_ai, self.players[ai_id])
+        print("Spawned AI tank.")
+
+    def bushes_near(self, x, y, radius):
+        if self.world is not None:
+            return self.world.bushes_near(x - radius, y - radius, 2 * radius, 2 * radius)
+        return self.bushes
+
+    def plan_ai(self, player):
+        # The heavier half of the AI (see ai.py), every ai.PLAN_INTERVAL:
+        # pick the nearest human, estimate their velocity since the last
+        # plan, and raycast for line of sight. update_ai follows the result.
+        if self.players.get(player['sid']) is not player:
+            return  # left the match
+        self.timers.schedule(ticks(ai.PLAN_INTERVAL), self.plan_ai, player)
+        humans = [p for p in self.players.values() if p.get('mode') == 'human' and p['alive']]
+        if not humans or not player['alive']:
+            self.ai_plans.pop(player['sid'], None)
+            return
+        x, y = player['x'] + 20, player['y'] + 20
+        target = min(humans, key=lambda p: (p['x'] + 20 - x) ** 2 + (p['y'] + 20 - y) ** 2)
+        tx, ty = target['x'] + 20, target['y'] + 20
+        velocity = (0.0, 0.0)
+        last = self.ai_plans.get(player['sid'])
+        if last and last['target'] == target['sid'] and last['spawn'] == target['spawn']:
+            elapsed = self.timers.now - last['seen_tick']
+            velocity = ((tx - last['seen'][0]) / elapsed, (ty - last['seen'][1]) / elapsed)
+        obstacles = [obstacle_box(obs) for obs in self.obstacles_along(x, y, tx, ty)]
+        bushes = [obstacle_box(bush) for bush in self.bushes_near(x, y, ai.SIGHT_RADIUS)]
+        plan = ai.plan(x, y, player['health'], tx, ty, obstacles, bushes)
+        gx, gy = plan['goal']
+        goal = (min(max(gx, 20), WORLD_WIDTH - 20), min(max(gy, 20), WORLD_HEIGHT - 20))
+        plan['step'], plan['steps'] = ai.route(x, y, goal, player['speed'] * 0.5 * TICK_SCALE)  # half speed
+        plan.update(target=target['sid'], spawn=target['spawn'], seen=(tx, ty),
+                    seen_tick=self.timers.now, velocity=velocity)
+        self.ai_plans[player['sid']] = plan
+
+    def update_ai(self, player):
+        # Follow the last plan: take its next step towards the goal, and
+        # fire leading the target only if the plan found a clear line of sight.
+        plan = self.ai_plans.get(player['sid'])
+        if plan is None or not player['alive']:
+            return
+        if plan['steps']:
+            plan['steps'] -= 1
+            player['x'] += plan['step'][0]
+            player['y'] += plan['step'][1]
+        # Shoot if the line is clear, in range and cooldown elapsed
+        now = self.timers.now
+        if plan['clear'] and plan['in_range'] and now - player['last_shot'] > ticks(AI_SHOT_COOLDOWN):
+            target = self.players.get(plan['target'])
+            if target is None or not target['alive']:
+                return
+            x, y = player['x'] + 20, player['y'] + 20
+            player['last_shot'] = now
+            player['angle'] = ai.lead_angle(x, y, target['x'] + 20, target['y'] + 20,
+                                            *plan['velocity'], 5 * TICK_SCALE)
+            bullet = {
+                'id': next(bullet_ids),
+                'x': x,
+                'y': y,
+                'angle': player['angle'],
+                'speed': 5,
+                'damage': player['damage'],
+                'owner': player['sid'],
+                'skill': None
+            }
+            self.bullets.append(bullet)
+            print("AI fired a bullet.")
+
+    # -------------------------------
+    # GAME LOOP
+    # -------------------------------
+    def tick(self, now):
+        """Advance the match by one server tick."""
+        # Fire whatever timed events are due this tick
+        self.timers.advance()
+        # Update AI-controlled tanks
+        for p in self.players.values():
+            if p.get('mode') == 'ai':
+                self.update_ai(p)
+        self.move_bullets()
+        if self.world is not None:
+            self.drop_stray_bullets()
+        self.collect_powerups()
+
+        if self.world is not None:
+            self.broadcast_large_world_state(now)
+        else:
+            # Broadcast overall game state to all clients
+            self.emit('game_state', self.game_state(now))
+        if self.spectators:
+            self.spectator_events.extend(self.events)
+        self.flush_events(now)
+        if self.spectators and self.timers.now % ticks(1 / SPECTATOR_RATE) == 0:
+            self.spectator_frame(now)
+
+    def spectator_frame(self, now):
+        # Frames wait in a buffer for SPECTATOR_DELAY, so they are serialized
+        # as soon as they are taken; the oldest one goes out to every
+        # spectator as the same pre-encoded string.
+        frame = self.game_state(now)
+        frame['events'] = self.spectator_events
+        self.spectator_events = []
+        self.spectator_frames.append(json.dumps(frame))
+        if len(self.spectator_frames) == self.spectator_frames.maxlen:
+            self.emit('spectate_state', self.spectator_frames[0], to=self.spectator_room)
+
+    def move_bullets(self):
+        # Move bullets and resolve the first thing each one hit along its path
+        players = self.players
+        bullets = self.bullets
+        for bullet in bullets[:]:
+            if self.bullets is not bullets:
+                break  # a hit ended the match and reset the room
+            angle = bullet['angle']
+            step = bullet['speed'] * TICK_SCALE
+            x0, y0 = bullet['x'], bullet['y']
+            x1 = x0 + step * math.cos(angle)
+            y1 = y0 + step * math.sin(angle)
+            bullet['x'], bullet['y'] = x1, y1
+            targets = [p for p in players.values() if p['sid'] != bullet['owner'] and p['alive']]
+            t_player, player = first_hit(x0, y0, x1, y1, targets, tank_box)
+            t_obs, obs = first_hit(x0, y0, x1, y1, self.obstacles_along(x0, y0, x1, y1), obstacle_box)
+            if obs is not None and (player is None or t_obs <= t_player):
+                self.hit_obstacle(bullet, obs)
+            elif player is not None:
+                self.hit_player(bullet, player)
+            elif (x1 < 0 or x1 > WORLD_WIDTH or
+                  y1 < 0 or y1 > WORLD_HEIGHT):
+                bullets.remove(bullet)
+
+    def drop_stray_bullets(self):
+        # Large world: a bullet that has left every human's streamed view
+        # would fly on for up to a minute, regenerating each chunk under it
+        # after the broadcast evicts it, so drop it instead.
+        rects = [view_rect(p) for p in self.players.values() if p.get('mode') == 'human']
+        self.bullets[:] = [b for b in self.bullets if any(in_rect(b, rect) for rect in rects)]
+
+    def collect_powerups(self):
+        # Check collisions with power-ups and apply effects
+        players = self.players
+        for power in self.powerups[:]:
+            for p in players.values():
+                if (p['alive'] and p['x'] < power['x'] < p['x']+40 and
+                    p['y'] < power['y'] < p['y']+40):
+                    self.event('powerup', power['x'], power['y'], sid=p['sid'], kind=power['type'])
+                    if power['type'] in ('speed', 'shield'):
+                        self.grant_powerup(p, power['type'])
+                    elif power['type'] == 'damage':
+                        p['damage'] += 5
+                    elif power['type'] == 'health':
+                        p['health'] = min(100, p['health'] + 30)
+                    elif power['type'] == 'xp':
+                        self.gain_xp(p, 30)
+                    self.powerups.remove(power)
+                    break
+
+    def game_state(self, now):
+        return {
+            'players': list(self.players.values()),
+            'bullets': self.bullets,
+            'obstacles': self.obstacles,
+            'bushes': self.bushes,
+            'powerups': self.powerups,
+            'time_left': self.time_left(),
+            'server_time': now
+        }
+
+    def hit_player(self, bullet, p):
+        players = self.players
+        damage = 0 if p['shield'] else bullet['damage']
+        p['health'] -= damage
+        self.bullets.remove(bullet)
+        self.event('hit', bullet['x'], bullet['y'], target=p['sid'], owner=bullet['owner'], damage=damage)
+        if p['health'] <= 0:
+            p['lives'] -= 1
+            p['alive'] = False
+            self.timers.schedule(ticks(RESPAWN_DELAY), self.respawn, p)
+            # Game over once a human has lost all lives
+            if p.get('mode') == 'human' and p['lives'] <= 0:
+                self.end_game()
+                return
+            # Award XP to the bullet’s owner if that player is human
+            owner = players.get(bullet['owner'])
+            if owner and owner.get('mode') == 'human':
+                self.gain_xp(owner, 20)
+
+    def gain_xp(self, p, amount):
+        p['xp'] += amount
+        if p['xp'] >= p['level'] * 100 and p['level'] < 4:
+            p['level'] += 1
+            p['damage'] += 5
+            self.event('level_up', p['x'] + 20, p['y'] + 20, sid=p['sid'], level=p['level'])
+            print(f"{p['name']} leveled up to {p['level']}!")
+
+    def hit_obstacle(self, bullet, obs):
+        # Destructible terrain: enough damage removes it with an explosion.
+        if self.damage_obstacle(obs, bullet['damage']):
+            self.event('explosion', obs['x'] + obs['width']/2, obs['y'] + obs['height']/2)
+        self.bullets.remove(bullet)
+
+    # -------------------------------
+    # TIMED EVENTS
+    # -------------------------------
+    def grant_powerup(self, p, kind):
+        # Picking up the same power-up again restarts its timer.
+        key = (p['sid'], kind)
+        timer = self.powerup_timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        elif kind == 'speed':
+            p['speed'] += 1
+        else:
+            p['shield'] = True
+        self.powerup_timers[key] = self.timers.schedule(ticks(POWERUP_DURATION), self.expire_powerup, p, kind)
+
+    def expire_powerup(self, p, kind):
+        del self.powerup_timers[(p['sid'], kind)]
+        if kind == 'speed':
+            p['speed'] -= 1
+        else:
+            p['shield'] = False
+
+    def respawn(self, p):
+        if self.players.get(p['sid']) is not p:
+            return  # left the match while dead
+        p['health'] = 100
+        p['x'], p['y'] = self.spawn_point(p['mode'], exclude=p)
+        p['spawn'] += 1
+        p['alive'] = True
+
+    def end_game(self):
+        if self.game_active:
+            self.game_active = False
+            self.determine_winner()
+
+    def time_left(self):
+        if self.game_active:
+            return max(0, GAME_DURATION - (self.timers.now - self.start_tick) / TICK_RATE)
+        return GAME_DURATION
+
+    def broadcast_large_world_state(self, now):
+        # Each human gets the terrain chunks around their viewport and only
+        # the bullets and power-ups inside it. Players are always sent in
+        # full since the list is small and drives the lobby and scoreboard.
+        time_left = self.time_left()
+        player_list = list(self.players.values())
+        keep = set()
+        for sid, p in list(self.players.items()):
+            if p.get('mode') != 'human':
+                continue
+            keep.update(self.stream_chunks(sid, p))
+            rect = view_rect(p)
+            state = {
+                'players': player_list,
+                'bullets': [b for b in self.bullets if in_rect(b, rect)],
+                'powerups': [pw for pw in self.powerups if in_rect(pw, rect)],
+                'time_left': time_left,
+                'server_time': now
+            }
+            self.emit('game_state', state, to=sid)
+        # Forget untouched terrain nobody can see; it regenerates from the seed.
+        self.world.evict(keep)
+
+    def determine_winner(self):
+        human_players = [p for p in self.players.values() if p.get('mode')=='human']
+        self.results = [dict(p) for p in human_players]
+        if not human_players:
+            winner = "No human players"
+        else:
+            winner = max(human_players, key=lambda p: (p['lives'], p['xp']))['name']
+        self.emit('game_over', {'winner': winner})
+        print(f"Game over! Winner: {winner}")
+        self.reset_game()
+
+    def reset_game(self):
+        self.players = {}     # key: sid (or AI id), value: player dictionary
+        self.bullets = []     # list of bullet dictionaries
+        self.obstacles = []   # destructible terrain objects
+        self.bushes = []      # bushes for stealth
+        self.powerups = []    # power-up objects
+        self.events = []      # one-shot effects queued this tick
+        self.spectator_events = []  # effects since the last spectator frame
+        self.spectator_frames = deque(maxlen=SPECTATOR_DELAY * SPECTATOR_RATE + 1)  # JSON strings
+        self.world = None     # World instance while a large-world game is running
+        self.client_chunks = {}  # key: sid, value: {chunk_key: version last sent}
+        self.powerup_timers = {}  # key: (sid, kind), value: expiry Timer
+        self.ai_plans = {}        # key: AI sid, value: its latest plan (see plan_ai)
+        self.game_mode = None    # "pvp" or "pve"
+        self.game_active = False
+        self.start_tick = 0
+        # Drop every pending event from the previous match
+        self.timers.cancel_all()
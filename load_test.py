@@ -0,0 +1,115 @@
+"""
+Local load test for the Socket.IO backends.
+
+Opens simulated players against a running server, has each one join and
+send player_update at 20 Hz, and reports how many connected plus the
+game_state tick period and delivery latency seen by the clients. Start one
+backend, then point the script at it:
+
+    python app.py                                  # eventlet backend
+    uvicorn app_async:app --port 5000              # asyncio backend
+    python load_test.py --clients 200 --duration 20
+    python load_test.py --tick-rate 10             # server run with TANK_TICK_RATE=10
+
+Both ends run on the same machine, so latency compares the client clock to
+the server_time stamped in each game_state. The load generator is itself a
+single asyncio process; use --clients well below what it can drive alone.
+"""
+import argparse
+import asyncio
+import math
+import random
+import statistics
+import time
+
+import socketio
+
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Stats:
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.connect_times = []
+        self.latencies = []     # ms from server_time to receipt
+        self.tick_periods = []  # ms between consecutive server_time stamps
+
+
+async def run_client(url, index, stats, stop):
+    client = socketio.AsyncClient(reconnection=False)
+    last_server_time = None
+
+    @client.on('game_state')
+    async def on_state(state):
+        nonlocal last_server_time
+        server_time = state.get('server_time')
+        if server_time is None:
+            return
+        stats.latencies.append((time.time() - server_time) * 1000)
+        if last_server_time is not None:
+            stats.tick_periods.append((server_time - last_server_time) * 1000)
+        last_server_time = server_time
+
+    start = time.perf_counter()
+    try:
+        await client.connect(url, transports=['websocket'])
+    except Exception:
+        stats.failed += 1
+        return
+    stats.connected += 1
+    stats.connect_times.append((time.perf_counter() - start) * 1000)
+    await client.emit('join', {'name': f"load{index}", 'mode': 'pvp'})
+
+    x, y, seq = random.uniform(0, 760), random.uniform(0, 560), 0
+    while not stop.is_set():
+        angle = random.uniform(0, 2 * math.pi)
+        x = min(760, max(0, x + 3 * math.cos(angle)))
+        y = min(560, max(0, y + 3 * math.sin(angle)))
+        seq += 1
+        try:
+            await client.emit('player_update', {'x': x, 'y': y, 'angle': angle, 'seq': seq})
+        except Exception:
+            break
+        await asyncio.sleep(0.05)
+    await client.disconnect()
+
+
+async def main(args):
+    stats = Stats()
+    stop = asyncio.Event()
+    tasks = []
+    for i in range(args.clients):
+        tasks.append(asyncio.create_task(run_client(args.url, i, stats, stop)))
+        await asyncio.sleep(1 / args.ramp)
+    # Only measure once everyone has had the chance to connect.
+    stats.latencies.clear()
+    stats.tick_periods.clear()
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"server:        {args.url}")
+    print(f"connected:     {stats.connected}/{args.clients} ({stats.failed} failed)")
+    if stats.connect_times:
+        print(f"connect ms:    median {statistics.median(stats.connect_times):.1f}  "
+              f"p99 {percentile(stats.connect_times, 99):.1f}")
+    print(f"tick period:   median {percentile(stats.tick_periods, 50):.1f} ms  "
+          f"p99 {percentile(stats.tick_periods, 99):.1f} ms  (target {1000 / args.tick_rate:.0f})")
+    print(f"state latency: median {percentile(stats.latencies, 50):.1f} ms  "
+          f"p99 {percentile(stats.latencies, 99):.1f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--ramp', type=float, default=50, help="new connections per second")
+    parser.add_argument('--duration', type=float, default=10, help="seconds to measure after ramp-up")
+    parser.add_argument('--tick-rate', type=float, default=20, help="the server's TANK_TICK_RATE")
+    asyncio.run(main(parser.parse_args()))
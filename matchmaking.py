@@ -0,0 +1,378 @@
+"""
+Matchmaking for the Socket.IO backends. Players no longer drop straight
+into one global match: a join puts them in the queue for their mode, and
+the Lobby starts a fresh GameRoom for every group it matches.
+
+Each mode's queue keeps waiting players in ping buckets, and each bucket is
+a list sorted by rating. Finding a player's slot on join or leave is a
+bisect, but inserting or deleting there shifts the rest of the list, so a
+join or leave is O(n) overall. The shift is a memmove: an add plus a remove
+costs about 6 us with 10,000 players in one bucket, less than a pure-Python
+balanced tree would take at that size.
+
+Once a second the lobby sweeps every bucket in rating order and groups
+neighbours whose ratings are close enough. The allowed spread grows with
+how long the group's oldest player has waited, and after PING_WIDEN_AFTER
+seconds players can also be matched across ping buckets. A batch is a
+generator that yields every few rooms, so the backend lets ticks run while
+a big queue is being matched.
+
+Ratings come from a JSON profile store: career level plus average XP per
+match, updated in memory when a player's match ends or they leave it. The
+matchmaking task writes the file off the event loop (see
+ProfileStore.snapshot), never on the tick path. Clients that never set a
+name all share the default one, so those players are never rated and
+always queue with a fresh rating.
+
+Spectators join a room's spectator channel instead of the match, up to
+SPECTATOR_CAP per room, and get its delayed low-rate stream.
+"""
+import bisect
+import itertools
+import json
+import os
+
+from game_server import SPECTATOR_DELAY, SPECTATOR_RATE, GameRoom
+
+PROFILE_PATH = os.environ.get('TANK_PROFILES', 'profiles.json')
+# Humans per room; pve rooms add the AI tank on top.
+MATCH_SIZES = {
+    'pvp': int(os.environ.get('TANK_PVP_MATCH_SIZE', 2)),
+    'pve': int(os.environ.get('TANK_PVE_MATCH_SIZE', 1)),
+}
+MATCH_INTERVAL = 1.0      # seconds between matching batches
+MAX_ROOMS_PER_BATCH = int(os.environ.get('TANK_MAX_ROOMS_PER_BATCH', 5000))  # the rest wait
+MATCH_YIELD_EVERY = 50    # rooms started between yields to the event loop
+MATCH_SCAN_CHUNK = 500    # queue entries scanned between yields
+RATING_WINDOW = 100       # rating spread allowed straight away
+RATING_WIDEN = 50         # extra spread per second the oldest player has waited
+MAX_RATING_WINDOW = 2000
+PING_BUCKET = 50          # ms of measured ping per bucket
+PING_WIDEN_AFTER = 10     # seconds before players match across ping buckets
+CAREER_LEVEL_XP = 500     # career XP per profile level
+RATING_PER_LEVEL = 100    # rating per career level, on top of average XP per match
+DEFAULT_NAMES = {'', 'Player'}  # what unnamed clients send; never rated
+SPECTATOR_CAP = int(os.environ.get('TANK_SPECTATOR_CAP', 1000))  # per room
+
+room_ids = itertools.count(1)
+
+
+def parse_ping(value):
+    # The client's measured ping in ms; anything unusable counts as 0.
+    try:
+        return max(0, int(float(value)))
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+class ProfileStore:
+    """Career XP and level per player name, kept in a JSON file."""
+
+    def __init__(self, path=PROFILE_PATH):
+        self.path = path
+        self.profiles = {}
+        self.dirty = False  # changed since the last snapshot
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.profiles = json.load(f)
+
+    def get(self, name):
+        return self.profiles.get(name, {'xp': 0, 'level': 1, 'matches': 0})
+
+    def rating(self, name):
+        if name in DEFAULT_NAMES:
+            return 0
+        profile = self.get(name)
+        return ((profile['level'] - 1) * RATING_PER_LEVEL
+                + profile['xp'] // max(1, profile['matches']))
+
+    def record(self, players):
+        # Add each human's XP from the match they just finished or left.
+        for p in players:
+            if p['name'] in DEFAULT_NAMES:
+                continue
+            profile = dict(self.get(p['name']))
+            profile['xp'] += p['xp']
+            profile['level'] = 1 + profile['xp'] // CAREER_LEVEL_XP
+            profile['matches'] += 1
+            self.profiles[p['name']] = profile
+            self.dirty = True
+
+    def snapshot(self):
+        """
+        Profiles to write if anything changed since the last snapshot, else
+        None. record() replaces profile dicts rather than mutating them, so
+        the copy can be written from another thread.
+        """
+        if not self.dirty or not self.path:
+            return None
+        self.dirty = False
+        return dict(self.profiles)
+
+    def write(self, profiles):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(profiles, f)
+        os.replace(tmp, self.path)
+
+    def save(self):
+        profiles = self.snapshot()
+        if profiles is not None:
+            self.write(profiles)
+
+
+class Ticket:
+    __slots__ = ('sid', 'name', 'mode', 'rating', 'ping', 'since', 'seq')
+
+    def __init__(self, sid, name, mode, rating, ping, since, seq):
+        self.sid = sid
+        self.name = name
+        self.mode = mode
+        self.rating = rating
+        self.ping = ping    # ms, as measured by the client
+        self.since = since  # when they joined the queue
+        self.seq = seq      # tie-breaker so entries never compare tickets
+
+
+class MatchQueue:
+    """Players waiting for one mode, by ping bucket, each sorted by rating."""
+
+    def __init__(self, match_size):
+        self.match_size = match_size
+        self.buckets = {}  # key: ping // PING_BUCKET, value: sorted [(rating, seq, ticket)]
+        self.tickets = {}  # key: sid, value: Ticket
+
+    def __len__(self):
+        return len(self.tickets)
+
+    def add(self, ticket):
+        bucket = self.buckets.setdefault(ticket.ping // PING_BUCKET, [])
+        bisect.insort(bucket, (ticket.rating, ticket.seq, ticket))
+        self.tickets[ticket.sid] = ticket
+
+    def remove(self, sid):
+        ticket = self.tickets.pop(sid, None)
+        if ticket is None:
+            return None
+        key = ticket.ping // PING_BUCKET
+        bucket = self.buckets[key]
+        del bucket[bisect.bisect_left(bucket, (ticket.rating, ticket.seq))]
+        if not bucket:
+            del self.buckets[key]
+        return ticket
+
+    def match(self, now):
+        """
+        Groups that can be matched now, found lazily from a snapshot of each
+        bucket. Nothing leaves the queue until the caller take()s a group,
+        and a group whose players left meanwhile simply fails to take. None
+        is yielded every MATCH_SCAN_CHUNK entries so the caller can pause.
+        """
+        for bucket in list(self.buckets.values()):
+            yield from self.sweep(list(bucket), now)
+        # Then across all buckets, for groups whose longest waiter has waited
+        # long enough to stop caring about ping. Tickets are kept in join
+        # order, so the first one tells whether anybody has yet.
+        oldest = next(iter(self.tickets.values()), None)
+        if oldest is not None and now - oldest.since >= PING_WIDEN_AFTER:
+            entries = sorted(itertools.chain(*self.buckets.values()))
+            yield from self.sweep(entries, now, PING_WIDEN_AFTER)
+
+    def sweep(self, entries, now, min_wait=0):
+        # Walk the entries in rating order and cut a group wherever the next
+        # match_size players fit inside their longest waiter's window.
+        size = self.match_size
+        i = 0
+        scanned = 0
+        while i + size <= len(entries):
+            scanned += 1
+            if scanned % MATCH_SCAN_CHUNK == 0:
+                yield None
+            group = [entry[2] for entry in entries[i:i + size]]
+            waited = now - min(t.since for t in group)
+            window = min(MAX_RATING_WINDOW, RATING_WINDOW + RATING_WIDEN * waited)
+            if waited >= min_wait and group[-1].rating - group[0].rating <= window:
+                yield group
+                i += size
+            else:
+                i += 1
+
+    def take(self, group):
+        """Remove the group from the queue; False if any of it already left."""
+        if any(self.tickets.get(ticket.sid) is not ticket for ticket in group):
+            return False
+        for ticket in group:
+            self.remove(ticket.sid)
+        return True
+
+
+class Lobby:
+    """
+    Every room on this server plus the matchmaking queues. Like GameRoom it
+    never touches the network: the backend drains the Socket.IO rooms that
+    players have to be added to, then the messages to send.
+    """
+
+    def __init__(self, profiles=None):
+        self.profiles = profiles if profiles is not None else ProfileStore()
+        self.queues = {mode: MatchQueue(size) for mode, size in MATCH_SIZES.items()}
+        self.rooms = {}         # key: room id, value: GameRoom
+        self.members = {}       # key: room id, value: set of sids
+        self.player_rooms = {}  # key: sid, value: room id
+        self.watching = {}      # key: spectator sid, value: room id
+        self.outbox = []        # (event, data, to), as in GameRoom
+        self.joins = []         # (sid, room id) the backend still has to enter
+        self.seq = itertools.count()
+
+    # -------------------------------
+    # OUTGOING MESSAGES
+    # -------------------------------
+    def emit(self, event, data, to=None):
+        self.outbox.append((event, data, to))
+
+    def drain(self):
+        # Room membership comes first so the new rooms' broadcasts reach everyone.
+        joins, self.joins = self.joins, []
+        messages, self.outbox = self.outbox, []
+        for room in self.rooms.values():
+            messages.extend(room.drain())
+        return joins, messages
+
+    # -------------------------------
+    # QUEUE
+    # -------------------------------
+    def room_of(self, sid):
+        return self.rooms.get(self.player_rooms.get(sid))
+
+    def handle_join(self, sid, data, now):
+        if sid in self.player_rooms or sid in self.watching:
+            return
+        mode = data.get('mode', 'pve')
+        if mode not in self.queues:
+            mode = 'pve'
+        name = str(data.get('name') or '').strip() or 'Player'
+        self.leave_queue(sid)  # joining again replaces the old ticket
+        queue = self.queues[mode]
+        ticket = Ticket(sid, name, mode, self.profiles.rating(name),
+                        parse_ping(data.get('ping')), now, next(self.seq))
+        queue.add(ticket)
+        self.emit('queued', {'mode': mode, 'rating': ticket.rating, 'waiting': len(queue)}, to=sid)
+
+    def leave_queue(self, sid):
+        for queue in self.queues.values():
+            if queue.remove(sid) is not None:
+                return
+
+    def match(self, now):
+        """
+        One matching batch; the backend runs it every MATCH_INTERVAL. This is
+        a generator: it yields after every MATCH_YIELD_EVERY rooms (and now
+        and then while scanning a long queue) so the backend can flush and
+        let ticks run in between.
+        """
+        budget = MAX_ROOMS_PER_BATCH
+        started = 0
+        for mode, queue in self.queues.items():
+            for group in queue.match(now):
+                if group is None:
+                    yield
+                elif queue.take(group):
+                    self.start_room(mode, group)
+                    started += 1
+                    if started == budget:
+                        return
+                    if started % MATCH_YIELD_EVERY == 0:
+                        yield
+
+    def start_room(self, mode, group):
+        room_id = f"room{next(room_ids)}"
+        room = GameRoom(room_id)
+        self.rooms[room_id] = room
+        self.members[room_id] = set()
+        names = [ticket.name for ticket in group]
+        for ticket in group:
+            self.joins.append((ticket.sid, room_id))
+            self.members[room_id].add(ticket.sid)
+            self.player_rooms[ticket.sid] = room_id
+            self.emit('matched', {'room': room_id, 'mode': mode, 'players': names}, to=ticket.sid)
+            room.handle_join(ticket.sid, {'name': ticket.name, 'mode': mode})
+        print(f"Matched {', '.join(names)} into {room_id} ({mode})")
+
+    # -------------------------------
+    # SPECTATORS
+    # -------------------------------
+    def handle_spectate(self, sid, data):
+        if sid in self.player_rooms or sid in self.watching:
+            return
+        if data.get('room'):
+            room = self.rooms.get(data['room'])
+        else:
+            # No room asked for: watch the biggest match.
+            room = max(self.rooms.values(), key=lambda r: len(r.players), default=None)
+        if room is None:
+            self.emit('spectate_error', {'error': "No match to watch"}, to=sid)
+            return
+        if len(room.spectators) >= SPECTATOR_CAP:
+            self.emit('spectate_error', {'error': "Too many spectators in this match"}, to=sid)
+            return
+        self.leave_queue(sid)
+        room.spectators.add(sid)
+        self.watching[sid] = room.room_id
+        self.joins.append((sid, room.spectator_room))
+        self.emit('spectating', {'room': room.room_id, 'delay': SPECTATOR_DELAY, 'rate': SPECTATOR_RATE}, to=sid)
+
+    def stop_watching(self, sid):
+        room = self.rooms.get(self.watching.pop(sid))
+        if room is not None:
+            room.spectators.discard(sid)
+            if not room.spectators:
+                room.spectator_frames.clear()  # don't replay stale frames to the next one
+
+    def metrics(self):
+        return {
+            'rooms': len(self.rooms),
+            'players': len(self.player_rooms),
+            'queued': {mode: len(queue) for mode, queue in self.queues.items()},
+            'spectators': len(self.watching),
+            'spectator_cap': SPECTATOR_CAP,
+            'spectators_per_room': {room_id: len(room.spectators)
+                                    for room_id, room in self.rooms.items() if room.spectators},
+        }
+
+    # -------------------------------
+    # ROOMS
+    # -------------------------------
+    def handle_disconnect(self, sid):
+        if sid in self.watching:
+            self.stop_watching(sid)
+            return
+        self.leave_queue(sid)
+        room = self.room_of(sid)
+        if room is None:
+            return
+        player = room.players.get(sid)
+        if player is not None and player.get('mode') == 'human':
+            self.profiles.record([player])
+        room.handle_disconnect(sid)
+        del self.player_rooms[sid]
+        self.members[room.room_id].discard(sid)
+        if not any(p.get('mode') == 'human' for p in room.players.values()):
+            self.close_room(room)
+
+    def tick(self, now):
+        for room in list(self.rooms.values()):
+            room.tick(now)
+            if room.results is not None:
+                self.profiles.record(room.results)
+                self.close_room(room)
+
+    def close_room(self, room):
+        # Keep its last messages (game_over) for the next drain.
+        self.outbox.extend(room.drain())
+        del self.rooms[room.room_id]
+        for sid in self.members.pop(room.room_id):
+            del self.player_rooms[sid]
+        if room.spectators:
+            self.emit('spectate_end', {'room': room.room_id}, to=room.spectator_room)
+            for sid in room.spectators:
+                del self.watching[sid]
@@ -0,0 +1,256 @@
+"""
+Network play against the app.py Socket.IO server. Joining puts us in the
+server's matchmaking queue; the match starts once we are placed in a room.
+
+NetClient keeps the pygame client in step with the server:
+  - our own tank is predicted locally from our inputs and reconciled against
+    the last input sequence number the server has acknowledged;
+  - remote players and bullets are drawn from a buffer of recent game_state
+    snapshots, interpolated a fixed delay behind the server clock;
+  - terrain comes from game_state, or from streamed chunks in large-world mode;
+  - one-shot effects (explosions, hits, pickups, level-ups) arrive once in
+    the server's per-tick events batch and are kept here until they finish.
+
+Socket.IO callbacks run on the client's own threads, so everything they touch
+is guarded by a lock.
+"""
+import math
+import threading
+import time
+from collections import deque
+
+INTERP_DELAY = 0.1        # seconds remote entities are shown behind the server
+SNAPSHOT_BUFFER = 32      # game_state snapshots kept for interpolation
+RECONCILE_EPSILON = 0.5   # prediction error (px) tolerated before correcting
+SHOT_COOLDOWN = 0.5       # seconds, mirrors the server's 500ms limit
+TANK_SIZE = 40
+EFFECT_DURATIONS = {'explosion': 1.5, 'hit': 0.3, 'powerup': 0.8, 'level_up': 1.5}  # seconds
+
+
+def lerp(a, b, t):
+    return a + (b - a) * t
+
+
+class NetClient:
+    def __init__(self, url, name, mode):
+        try:
+            import socketio
+        except ImportError:
+            raise RuntimeError("Network play needs python-socketio: pip install 'python-socketio[client]'")
+        self.url = url
+        self.name = name
+        self.mode = mode
+        self.sio = socketio.Client(reconnection=False)
+        self.lock = threading.Lock()
+
+        self.snapshots = deque(maxlen=SNAPSHOT_BUFFER)  # (server_time, state)
+        self.clock_offset = None  # local monotonic time minus server time
+        self.me = None            # our player dictionary, positions predicted
+        self.prev_pos = None      # predicted position at the previous tick
+        self.pending = deque()    # (seq, dx, dy) inputs not yet acknowledged
+        self.seq = 0
+        self.last_shot = 0
+        self.world = {'width': 800, 'height': 600, 'large': False, 'chunk_size': None}
+        self.chunks = {}          # key: (cx, cy), value: chunk from world_chunks
+        self.effects = []         # (local time received, event) still playing
+        self.winner = None
+        self.error = None         # why the connection ended, if it did early
+
+        self.sio.on('joined', self._on_joined)
+        self.sio.on('world_info', self._on_world_info)
+        self.sio.on('world_chunks', self._on_world_chunks)
+        self.sio.on('game_state', self._on_game_state)
+        self.sio.on('game_over', self._on_game_over)
+        self.sio.on('events', self._on_events)
+        self.sio.on('disconnect', self._on_disconnect)
+        self.sio.on('connect_error', self._on_connect_error)
+
+    # ---- connection ----
+    def connect(self):
+        self.sio.connect(self.url)
+        # Time a round trip first so matchmaking can group players by ping.
+        start = time.monotonic()
+        self.sio.call('ping_check', {}, timeout=5)
+        ping = (time.monotonic() - start) * 1000
+        self.sio.emit('join', {'name': self.name, 'mode': self.mode, 'ping': round(ping)})
+
+    def close(self):
+        if self.sio.connected:
+            self.sio.disconnect()
+
+    # ---- server events ----
+    def _on_joined(self, data):
+        with self.lock:
+            self.me = dict(data)
+            self.prev_pos = (self.me['x'], self.me['y'])
+            self.pending.clear()
+
+    def _on_world_info(self, data):
+        with self.lock:
+            self.world = data
+            self.chunks = {}
+
+    def _on_world_chunks(self, data):
+        with self.lock:
+            for chunk in data['chunks']:
+                self.chunks[(chunk['cx'], chunk['cy'])] = chunk
+            for key in data['drop']:
+                self.chunks.pop(tuple(key), None)
+
+    def _on_game_over(self, data):
+        self.winner = data.get('winner', 'Unknown')
+
+    def _on_disconnect(self, *reason):
+        # No reconnection: the match is lost unless it had already finished.
+        if self.winner is None and self.error is None:
+            self.error = "Lost connection to the server"
+
+    def _on_connect_error(self, data=None):
+        self.error = f"Could not reach the server: {data}" if data else "Could not reach the server"
+
+    def _on_events(self, data):
+        now = time.monotonic()
+        with self.lock:
+            self.effects.extend((now, event) for event in data['events'])
+
+    def _on_game_state(self, state):
+        now = time.monotonic()
+        server_time = state.get('server_time', now)
+        with self.lock:
+            # Track the smallest observed offset so network jitter does not
+            # shift the interpolation timeline.
+            offset = now - server_time
+            if self.clock_offset is None or offset < self.clock_offset:
+                self.clock_offset = offset
+            self.snapshots.append((server_time, state))
+            self._reconcile(state)
+
+    def _reconcile(self, state):
+        if self.me is None:
+            return
+        server_me = next((p for p in state.get('players', []) if p['sid'] == self.me['sid']), None)
+        if server_me is None:
+            return
+        for key in ('health', 'lives', 'xp', 'level', 'damage', 'speed'):
+            self.me[key] = server_me[key]
+        if server_me.get('spawn', 0) != self.me.get('spawn', 0):
+            # The server moved us (respawn): take its position outright.
+            self.me['spawn'] = server_me['spawn']
+            self.me['x'], self.me['y'] = server_me['x'], server_me['y']
+            self.prev_pos = (self.me['x'], self.me['y'])
+            self.pending.clear()
+            return
+        acked = server_me.get('last_seq', 0)
+        while self.pending and self.pending[0][0] <= acked:
+            self.pending.popleft()
+        # Replay the inputs the server has not seen yet on top of its position.
+        x, y = server_me['x'], server_me['y']
+        for _, dx, dy in self.pending:
+            x, y = self._clamp(x + dx, y + dy)
+        if abs(x - self.me['x']) > RECONCILE_EPSILON or abs(y - self.me['y']) > RECONCILE_EPSILON:
+            self.me['x'], self.me['y'] = x, y
+
+    # ---- local input ----
+    def _clamp(self, x, y):
+        return (max(0, min(x, self.world['width'] - TANK_SIZE)),
+                max(0, min(y, self.world['height'] - TANK_SIZE)))
+
+    def predict(self, move_x, move_y, angle):
+        """Apply one tick of local movement and send it to the server."""
+        with self.lock:
+            if self.me is None:
+                return
+            self.prev_pos = (self.me['x'], self.me['y'])
+            length = math.hypot(move_x, move_y)
+            if length == 0 and angle == self.me['angle']:
+                return
+            speed = self.me.get('speed', 3)
+            if length:
+                move_x, move_y = move_x / length * speed, move_y / length * speed
+            x, y = self._clamp(self.me['x'] + move_x, self.me['y'] + move_y)
+            self.seq += 1
+            self.pending.append((self.seq, x - self.me['x'], y - self.me['y']))
+            self.me['x'], self.me['y'], self.me['angle'] = x, y, angle
+            update = {'x': x, 'y': y, 'angle': angle, 'seq': self.seq, 'spawn': self.me.get('spawn', 0)}
+        self.sio.emit('player_update', update)
+
+    def shoot(self, angle):
+        now = time.monotonic()
+        if self.me is None or now - self.last_shot < SHOT_COOLDOWN:
+            return
+        self.last_shot = now
+        x, y = self.center()
+        self.sio.emit('shoot', {'x': x, 'y': y, 'angle': angle})
+
+    def skill(self, key, angle):
+        if self.me is None:
+            return
+        x, y = self.center()
+        self.sio.emit('skill', {'skill': key, 'x': x, 'y': y, 'angle': angle})
+
+    def center(self):
+        return self.me['x'] + TANK_SIZE / 2, self.me['y'] + TANK_SIZE / 2
+
+    def local_position(self, blend=1.0):
+        # Own tank drawn between the last two predicted ticks.
+        with self.lock:
+            if self.me is None:
+                return None
+            px, py = self.prev_pos
+            return lerp(px, self.me['x'], blend), lerp(py, self.me['y'], blend)
+
+    # ---- remote view ----
+    def view(self, now=None):
+        """
+        The world as it was INTERP_DELAY ago on the server, with players and
+        bullets interpolated between the two snapshots around that moment.
+        Returns None until the first snapshot arrives.
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            if not self.snapshots:
+                return None
+            snaps = list(self.snapshots)
+            target = now - self.clock_offset - INTERP_DELAY
+            chunks = list(self.chunks.values())
+        older = newer = snaps[-1]
+        if target <= snaps[0][0]:
+            older = newer = snaps[0]
+        else:
+            for i in range(len(snaps) - 1):
+                if snaps[i][0] <= target <= snaps[i + 1][0]:
+                    older, newer = snaps[i], snaps[i + 1]
+                    break
+        span = newer[0] - older[0]
+        t = (target - older[0]) / span if span > 0 else 1.0
+        view = dict(newer[1])
+        view['players'] = self._blend(older[1].get('players', []), newer[1].get('players', []), 'sid', t)
+        view['bullets'] = self._blend(older[1].get('bullets', []), newer[1].get('bullets', []), 'id', t)
+        if self.world.get('large'):
+            view['obstacles'] = [obs for chunk in chunks for obs in chunk['obstacles']]
+            view['bushes'] = [bush for chunk in chunks for bush in chunk['bushes']]
+        return view
+
+    def active_effects(self, now=None):
+        """Effects still playing, as (progress 0..1, event)."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self.effects = [(born, e) for born, e in self.effects
+                            if now - born < EFFECT_DURATIONS.get(e['type'], 0)]
+            return [((now - born) / EFFECT_DURATIONS[e['type']], e) for born, e in self.effects]
+
+    @staticmethod
+    def _blend(old_items, new_items, key, t):
+        previous = {item.get(key): item for item in old_items}
+        blended = []
+        for item in new_items:
+            before = previous.get(item.get(key))
+            # Nothing to blend from, or the server teleported it (respawn).
+            if before is None or item.get(key) is None or before.get('spawn') != item.get('spawn'):
+                blended.append(item)
+                continue
+            item = dict(item)
+            item['x'] = lerp(before['x'], item['x'], t)
+            item['y'] = lerp(before['y'], item['y'], t)
+            blended.append(item)
+        return blended
@@ -0,0 +1,73 @@
+"""
+Tick-driven timer wheel for timed game events (power-up expiry, explosions,
+respawns, periodic spawns).
+
+Timers are hashed into a fixed ring of slots by the tick they are due on, so
+advancing one tick only looks at that tick's slot instead of polling every
+timer. Delays longer than the ring simply wait in their slot for later laps.
+Only occupied slots are stored, so an idle wheel (one per room) costs
+almost nothing to create or clear.
+"""
+
+
+class Timer:
+    __slots__ = ("due", "interval", "callback", "args", "cancelled")
+
+    def __init__(self, due, interval, callback, args):
+        self.due = due
+        self.interval = interval  # ticks between repeats, or None for one-shot
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    def __init__(self, slots=512):
+        self.size = slots
+        self.slots = {}    # key: slot index, value: timers hashed there
+        self.now = 0       # current tick
+        self.running = []  # timers being fired by advance(), for cancel_all()
+
+    def schedule(self, delay, callback, *args):
+        """Run callback(*args) delay ticks from now (at least one)."""
+        return self._insert(Timer(self.now + max(1, int(delay)), None, callback, args))
+
+    def every(self, interval, callback, *args):
+        """Run callback(*args) every interval ticks until cancelled."""
+        interval = max(1, int(interval))
+        return self._insert(Timer(self.now + interval, interval, callback, args))
+
+    def _insert(self, timer):
+        self.slots.setdefault(timer.due % self.size, []).append(timer)
+        return timer
+
+    def cancel_all(self):
+        for slot in self.slots.values():
+            for timer in slot:
+                timer.cancelled = True
+        self.slots.clear()
+        for timer in self.running:
+            timer.cancelled = True
+
+    def advance(self):
+        """Move to the next tick and fire the timers due on it."""
+        self.now += 1
+        index = self.now % self.size
+        slot = self.slots.pop(index, None)
+        if not slot:
+            return
+        self.running = [t for t in slot if t.due <= self.now and not t.cancelled]
+        later = [t for t in slot if t.due > self.now and not t.cancelled]
+        if later:
+            self.slots[index] = later
+        for timer in self.running:
+            if timer.cancelled:
+                continue
+            timer.callback(*timer.args)
+            if timer.interval and not timer.cancelled:
+                timer.due = self.now + timer.interval
+                self._insert(timer)
+        self.running = []
@@ -20,6 +20,15 @@ let shotCooldown = 500; // milliseconds
 let gameStarted = false;
 let mode = "pve";  // default mode
 
+// World info (large-world mode streams terrain in chunks around the viewport).
+let worldInfo = { width: canvas.width, height: canvas.height, large: false, chunk_size: null };
+let worldChunks = {};  // key: "cx,cy", value: chunk data from the server
+let camera = { x: 0, y: 0 };
+
+// One-shot effects from the server's per-tick "events" batch, played locally.
+let effects = [];
+let effectDurations = { explosion: 1500, hit: 300, powerup: 800, level_up: 1500 };  // milliseconds
+
 // Images
 let firePurpleImage = new Image();
 firePurpleImage.src = '/static/fire_purple.png';
@@ -33,6 +42,10 @@ document.getElementById("pveBtn").addEventListener("click", () => {
   mode = "pve";
   startGame();
 });
+document.getElementById("spectateBtn").addEventListener("click", () => {
+  socket.emit("spectate", {});
+  menuDiv.style.display = "none";
+});
 document.getElementById("quitBtn").addEventListener("click", () => {
   window.close(); // May not work in most browsers
 });
@@ -70,16 +83,86 @@ socket.on("lobby_update", function(data) {
 // Receive game state updates.
 socket.on("game_state", function(state) {
   gameState = state;
+  // The server moved our tank (respawn): take its position.
+  if (myPlayer && state.players) {
+    let me = state.players.find(p => p.sid === myPlayer.sid);
+    if (me) {
+      // Power-ups change our speed on the server.
+      myPlayer.speed = me.speed;
+      myPlayer.alive = me.alive;
+    }
+    if (me && me.spawn !== myPlayer.spawn) {
+      myPlayer.x = me.x;
+      myPlayer.y = me.y;
+      myPlayer.spawn = me.spawn;
+    }
+  }
   if (!gameStarted) return;
   render();
 });
 
+// Explosions, hits, pickups and level-ups: sent once, animated here.
+socket.on("events", function(data) {
+  let now = performance.now();
+  data.events.forEach(ev => {
+    ev.born = now;
+    effects.push(ev);
+  });
+});
+
 // When game over, display the game over screen.
 socket.on("game_over", function(data) {
   gameOverDiv.style.display = "flex";
   winnerText.textContent = "Winner: " + data.winner;
 });
 
+// World dimensions and whether terrain is streamed in chunks.
+socket.on("world_info", function(data) {
+  worldInfo = data;
+  worldChunks = {};
+});
+
+// Terrain chunks around our viewport: new or changed ones, plus ones to drop.
+socket.on("world_chunks", function(data) {
+  data.chunks.forEach(chunk => {
+    worldChunks[chunk.cx + "," + chunk.cy] = chunk;
+  });
+  data.drop.forEach(key => {
+    delete worldChunks[key[0] + "," + key[1]];
+  });
+});
+
+// Spectating: a delayed, low-rate copy of a match, sent as a JSON string.
+socket.on("spectating", function(data) {
+  lobbyDiv.innerHTML = "<strong>Watching " + data.room + "</strong><br>(" + data.delay + "s delay)";
+});
+socket.on("spectate_state", function(frame) {
+  let state = JSON.parse(frame);
+  let now = performance.now();
+  state.events.forEach(ev => {
+    ev.born = now;
+    effects.push(ev);
+  });
+  gameState = state;
+  render();
+});
+socket.on("spectate_error", function(data) {
+  alert(data.error);
+  menuDiv.style.display = "flex";
+});
+socket.on("spectate_end", function(data) {
+  gameOverDiv.style.display = "flex";
+  winnerText.textContent = "The match has ended.";
+});
+
+// Waiting in the matchmaking queue until a room is found for us.
+socket.on("queued", function(data) {
+  ctx.clearRect(0, 0, canvas.width, canvas.height);
+  ctx.fillStyle = "#fff";
+  ctx.font = "16px 'Press Start 2P'";
+  ctx.fillText("Searching for a " + data.mode.toUpperCase() + " match...", 150, canvas.height / 2);
+});
+
 // When joined, assign our player data.
 socket.on("joined", function(data) {
   myPlayer = data;
@@ -88,7 +171,11 @@ socket.on("joined", function(data) {
 // Start the game: prompt for a name, send join event, and hide the menu.
 function startGame() {
   let name = prompt("Enter your name:") || "Player";
-  socket.emit("join", { name: name, mode: mode });
+  // Time a round trip first so matchmaking can group players by ping.
+  let sent = Date.now();
+  socket.emit("ping_check", {}, () => {
+    socket.emit("join", { name: name, mode: mode, ping: Date.now() - sent });
+  });
   menuDiv.style.display = "none";
   gameStarted = true;
   gameLoop();
@@ -107,8 +194,8 @@ canvas.addEventListener("contextmenu", function(e) {
   e.preventDefault();
   if (!myPlayer) return;
   let rect = canvas.getBoundingClientRect();
-  let mouseX = e.clientX - rect.left;
-  let mouseY = e.clientY - rect.top;
+  let mouseX = e.clientX - rect.left + camera.x;
+  let mouseY = e.clientY - rect.top + camera.y;
   let centerX = myPlayer.x + 20;
   let centerY = myPlayer.y + 20;
   let angle = Math.atan2(mouseY - centerY, mouseX - centerX);
@@ -134,8 +221,8 @@ document.addEventListener("keydown", function(e) {
 canvas.addEventListener("mousemove", function(e) {
   if (!myPlayer) return;
   let rect = canvas.getBoundingClientRect();
-  let mouseX = e.clientX - rect.left;
-  let mouseY = e.clientY - rect.top;
+  let mouseX = e.clientX - rect.left + camera.x;
+  let mouseY = e.clientY - rect.top + camera.y;
   let centerX = myPlayer.x + 20;
   let centerY = myPlayer.y + 20;
   myPlayer.angle = Math.atan2(mouseY - centerY, mouseX - centerX);
@@ -150,6 +237,7 @@ function gameLoop() {
 // Update player's position based on WASD.
 function update() {
   if (!myPlayer) return;
+  if (myPlayer.alive === false) return;  // the server ignores us until we respawn
   let speed = myPlayer.speed || 3;
   let dx = 0, dy = 0;
   if (keysPressed["w"]) dy -= speed;
@@ -163,18 +251,35 @@ function update() {
   }
   myPlayer.x += dx;
   myPlayer.y += dy;
-  // Keep within canvas boundaries.
-  myPlayer.x = Math.max(0, Math.min(myPlayer.x, canvas.width - 40));
-  myPlayer.y = Math.max(0, Math.min(myPlayer.y, canvas.height - 40));
-  socket.emit("player_update", { x: myPlayer.x, y: myPlayer.y, angle: myPlayer.angle });
+  // Keep within world boundaries.
+  myPlayer.x = Math.max(0, Math.min(myPlayer.x, worldInfo.width - 40));
+  myPlayer.y = Math.max(0, Math.min(myPlayer.y, worldInfo.height - 40));
+  socket.emit("player_update", { x: myPlayer.x, y: myPlayer.y, angle: myPlayer.angle, spawn: myPlayer.spawn });
 }
 
 // Render the game state.
 function render() {
   ctx.clearRect(0, 0, canvas.width, canvas.height);
+  // Follow our tank in large-world mode; the classic arena fits the canvas.
+  if (worldInfo.large && myPlayer) {
+    camera.x = Math.max(0, Math.min(myPlayer.x + 20 - canvas.width / 2, worldInfo.width - canvas.width));
+    camera.y = Math.max(0, Math.min(myPlayer.y + 20 - canvas.height / 2, worldInfo.height - canvas.height));
+  }
+  ctx.save();
+  ctx.translate(-camera.x, -camera.y);
+  let obstacles = gameState.obstacles;
+  let bushes = gameState.bushes;
+  if (worldInfo.large) {
+    obstacles = [];
+    bushes = [];
+    Object.values(worldChunks).forEach(chunk => {
+      obstacles = obstacles.concat(chunk.obstacles);
+      bushes = bushes.concat(chunk.bushes);
+    });
+  }
   // Draw obstacles.
-  if (gameState.obstacles) {
-    gameState.obstacles.forEach(obs => {
+  if (obstacles) {
+    obstacles.forEach(obs => {
       ctx.fillStyle = "#654321"; // brown color for destructible terrain
       ctx.fillRect(obs.x, obs.y, obs.width, obs.height);
       if (obs.health < 50) {
@@ -184,8 +289,8 @@ function render() {
     });
   }
   // Draw bushes (with transparency).
-  if (gameState.bushes) {
-    gameState.bushes.forEach(bush => {
+  if (bushes) {
+    bushes.forEach(bush => {
       ctx.fillStyle = "rgba(34,139,34,0.6)";
       ctx.fillRect(bush.x, bush.y, bush.width, bush.height);
     });
@@ -206,6 +311,7 @@ function render() {
   // Draw players.
   if (gameState.players) {
     gameState.players.forEach(player => {
+      if (player.alive === false) return;  // waiting to respawn
       ctx.fillStyle = player.team === "blue" ? "#0000FF" : "#FF0000";
       ctx.fillRect(player.x, player.y, 40, 40);
       ctx.strokeStyle = "#000";
@@ -230,16 +336,24 @@ function render() {
       ctx.drawImage(firePurpleImage, bullet.x - bulletSize / 2, bullet.y - bulletSize / 2, bulletSize, bulletSize);
     });
   }
-  // Draw explosions.
-  if (gameState.explosions) {
-    gameState.explosions.forEach(exp => {
-      let radius = Math.max(0, 30 - exp.timer);
+  // Draw effects, dropping the ones that have finished.
+  let now = performance.now();
+  effects = effects.filter(ev => now - ev.born < effectDurations[ev.type]);
+  effects.forEach(ev => {
+    let progress = (now - ev.born) / effectDurations[ev.type];
+    if (ev.type === "explosion" || ev.type === "hit") {
       ctx.beginPath();
-      ctx.arc(exp.x, exp.y, radius, 0, Math.PI * 2);
-      ctx.strokeStyle = "#FFA500";
+      ctx.arc(ev.x, ev.y, (ev.type === "explosion" ? 30 : 12) * progress, 0, Math.PI * 2);
+      ctx.strokeStyle = ev.type === "explosion" ? "#FFA500" : "#fff";
       ctx.stroke();
-    });
-  }
+    } else {
+      ctx.fillStyle = "#ff0";
+      ctx.font = "10px 'Press Start 2P'";
+      let label = ev.type === "level_up" ? "LEVEL " + ev.level + "!" : ev.kind.toUpperCase();
+      ctx.fillText(label, ev.x, ev.y - 20 * progress);
+    }
+  });
+  ctx.restore();
   // Draw remaining time.
   if (gameState.time_left !== undefined) {
     ctx.fillStyle = "#fff";
@@ -0,0 +1,63 @@
+import math
+
+import ai
+
+
+def hits(angle, tx, ty, vx, vy, speed, radius=20):
+    # Step a bullet from the origin and a target together; True if the
+    # bullet ever passes within radius of the target's centre.
+    bx = by = 0
+    for _ in range(200):
+        bx += speed * math.cos(angle)
+        by += speed * math.sin(angle)
+        tx += vx
+        ty += vy
+        if math.hypot(tx - bx, ty - by) <= radius:
+            return True
+    return False
+
+
+def test_lead_angle_hits_a_strafing_target_that_direct_aim_misses():
+    tx, ty, vx, vy, speed = 300, 0, 0, 3, 5
+    assert hits(ai.lead_angle(0, 0, tx, ty, vx, vy, speed), tx, ty, vx, vy, speed)
+    assert not hits(math.atan2(ty, tx), tx, ty, vx, vy, speed)
+
+
+def test_lead_angle_stationary_target_aims_straight_at_it():
+    assert ai.lead_angle(0, 0, 0, 100, 0, 0, 5) == math.atan2(100, 0)
+
+
+def test_lead_angle_falls_back_to_direct_aim_when_target_is_too_fast():
+    # Running away faster than the bullet: no intercept exists.
+    assert ai.lead_angle(0, 0, 100, 0, 10, 0, 5) == math.atan2(0, 100)
+
+
+def test_plan_holds_preferred_range_with_a_clear_line():
+    plan = ai.plan(0, 0, 100, 400, 0, obstacles=[], bushes=[])
+    assert plan['clear']
+    gx, gy = plan['goal']
+    assert math.isclose(gx, 400 - ai.PREFERRED_RANGE) and gy == 0
+
+
+def test_plan_drives_at_the_target_when_blocked():
+    plan = ai.plan(0, 0, 100, 400, 0, obstacles=[(200, -20, 40, 40)], bushes=[])
+    assert not plan['clear']
+    assert plan['goal'] == (400, 0)
+
+
+def test_plan_ignores_terrain_the_target_is_inside():
+    plan = ai.plan(0, 0, 100, 220, 0, obstacles=[(200, -20, 40, 40)], bushes=[])
+    assert plan['clear']
+
+
+def test_plan_heads_for_cover_when_hurt():
+    plan = ai.plan(0, 0, ai.COVER_HEALTH, 100, 0, obstacles=[],
+                   bushes=[(300, 300, 60, 60), (-90, -30, 60, 60)])
+    assert plan['goal'] == (-60, 0)
+
+
+def test_route_reaches_the_goal_exactly():
+    (dx, dy), steps = ai.route(0, 0, (30, 40), 4)
+    assert steps == 13
+    assert math.isclose(dx * steps, 30) and math.isclose(dy * steps, 40)
+    assert ai.route(5, 5, (5, 5), 4) == ((0.0, 0.0), 0)
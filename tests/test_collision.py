@@ -0,0 +1,64 @@
+from collision import first_hit, segment_aabb
+from game_server import GameRoom
+
+BOX = (100, 100, 40, 40)  # left, top, width, height
+
+
+def test_fast_segment_through_box_hits():
+    # Both ends lie outside a box the segment tunnels straight through.
+    t = segment_aabb(0, 120, 300, 120, *BOX)
+    assert t == 100 / 300
+
+
+def test_segment_ending_short_of_box_misses():
+    assert segment_aabb(0, 120, 99, 120, *BOX) is None
+
+
+def test_segment_missing_box_misses():
+    assert segment_aabb(0, 0, 300, 50, *BOX) is None
+
+
+def test_edge_contact_does_not_count():
+    # Running along an edge, ending on one, or grazing a corner: only the
+    # interior counts, as with the old point tests.
+    assert segment_aabb(0, 100, 300, 100, *BOX) is None
+    assert segment_aabb(0, 120, 100, 120, *BOX) is None
+    assert segment_aabb(80, 80, 100, 100, *BOX) is None
+
+
+def test_segment_starting_inside_hits_at_zero():
+    assert segment_aabb(120, 120, 500, 500, *BOX) == 0
+
+
+def test_zero_length_segment_is_a_point_test():
+    assert segment_aabb(120, 120, 120, 120, *BOX) == 0
+    assert segment_aabb(90, 120, 90, 120, *BOX) is None
+
+
+def test_first_hit_returns_earliest_candidate():
+    near = {'x': 100, 'y': 100}
+    far = {'x': 200, 'y': 100}
+    box = lambda c: (c['x'], c['y'], 40, 40)
+    t, hit = first_hit(0, 120, 300, 120, [far, near], box)
+    assert hit is near
+    assert t == 100 / 300
+
+
+def test_first_hit_without_a_hit():
+    assert first_hit(0, 0, 10, 0, [{'x': 100, 'y': 100}], lambda c: (c['x'], c['y'], 40, 40)) == (None, None)
+
+
+def test_room_bullet_faster_than_a_tank_is_wide_still_hits():
+    # At low tick rates a bullet can move further per tick than a tank is
+    # wide; the swept test must still catch it passing through.
+    room = GameRoom()
+    room.obstacles = []
+    room.players = {
+        'target': {'sid': 'target', 'x': 100, 'y': 100, 'alive': True, 'shield': False,
+                   'health': 100, 'lives': 3, 'mode': 'human'},
+    }
+    room.bullets = [{'id': 1, 'x': 60, 'y': 120, 'angle': 0, 'speed': 200,
+                     'damage': 20, 'owner': 'shooter', 'skill': None}]
+    room.move_bullets()
+    assert room.bullets == []
+    assert room.players['target']['health'] == 80
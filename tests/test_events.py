@@ -0,0 +1,49 @@
+from collections import Counter
+
+from game_server import GameRoom
+
+
+def room_after_setup():
+    room = GameRoom('r1')
+    room.handle_join('a', {'name': 'ann', 'mode': 'pvp'})
+    room.handle_join('b', {'name': 'bob', 'mode': 'pvp'})
+    room.tick(0.0)  # spawns the terrain
+    room.drain()
+    a, b = room.players['a'], room.players['b']
+    a['x'], a['y'] = 100, 100
+    b['x'], b['y'] = 500, 400
+    room.obstacles = [{'x': 300, 'y': 300, 'width': 40, 'height': 40, 'health': 10}]
+    room.bushes = []
+    return room
+
+
+def bullet(x, y, owner):
+    return {'id': 0, 'x': x, 'y': y, 'angle': 0, 'speed': 5, 'damage': 20, 'owner': owner, 'skill': None}
+
+
+def test_effects_of_one_tick_arrive_once_in_one_events_message():
+    room = room_after_setup()
+    room.players['a']['xp'] = 90  # the pickup below levels ann up
+    room.bullets = [bullet(298, 320, 'a'), bullet(498, 420, 'a')]
+    room.powerups = [{'x': 120, 'y': 120, 'width': 20, 'height': 20, 'type': 'xp', 'duration': 5000}]
+    room.tick(1.0)
+    batches = [data for event, data, to in room.drain() if event == 'events']
+    assert len(batches) == 1
+    events = batches[0]['events']
+    assert Counter(e['type'] for e in events) == {'explosion': 1, 'hit': 1, 'powerup': 1, 'level_up': 1}
+    hit = next(e for e in events if e['type'] == 'hit')
+    assert (hit['target'], hit['owner'], hit['damage']) == ('b', 'a', 20)
+
+    # Played once: the next tick sends no events at all.
+    room.tick(2.0)
+    assert [event for event, _, _ in room.drain() if event == 'events'] == []
+
+
+def test_game_state_carries_no_cosmetic_state():
+    room = room_after_setup()
+    room.bullets = [bullet(298, 320, 'a')]
+    room.tick(1.0)
+    states = [data for event, data, to in room.drain() if event == 'game_state']
+    assert len(states) == 1
+    assert set(states[0]) == {'players', 'bullets', 'obstacles', 'bushes', 'powerups',
+                              'time_left', 'server_time'}
@@ -0,0 +1,124 @@
+import itertools
+
+import matchmaking
+from matchmaking import (MATCH_YIELD_EVERY, PING_BUCKET, PING_WIDEN_AFTER, RATING_WIDEN,
+                         RATING_WINDOW, Lobby, MatchQueue, ProfileStore, Ticket, parse_ping)
+
+seq = itertools.count()
+
+
+def ticket(sid, rating, ping=0, since=0):
+    return Ticket(sid, sid, 'pvp', rating, ping, since, next(seq))
+
+
+def sids(groups):
+    return [sorted(t.sid for t in group) for group in groups]
+
+
+def take_all(queue, now):
+    return [group for group in queue.match(now) if group is not None and queue.take(group)]
+
+
+def run(batch):
+    for _ in batch:
+        pass
+
+
+def test_add_and_remove_keep_buckets_sorted():
+    queue = MatchQueue(2)
+    for sid, rating in (('a', 300), ('b', 100), ('c', 200)):
+        queue.add(ticket(sid, rating))
+    assert [entry[2].sid for entry in queue.buckets[0]] == ['b', 'c', 'a']
+    assert queue.remove('c').sid == 'c'
+    assert queue.remove('c') is None
+    assert [entry[2].sid for entry in queue.buckets[0]] == ['b', 'a']
+    queue.remove('a')
+    queue.remove('b')
+    assert len(queue) == 0
+    assert queue.buckets == {}
+
+
+def test_match_groups_rating_neighbours_and_takes_them():
+    queue = MatchQueue(2)
+    for sid, rating in (('a', 0), ('b', 10), ('c', 1000), ('d', 1010), ('e', 5000)):
+        queue.add(ticket(sid, rating))
+    assert sids(take_all(queue, now=0)) == [['a', 'b'], ['c', 'd']]
+    assert list(queue.tickets) == ['e']
+
+
+def test_group_with_a_departed_player_is_not_taken():
+    queue = MatchQueue(2)
+    queue.add(ticket('a', 0))
+    queue.add(ticket('b', 0))
+    group = next(queue.match(now=0))
+    queue.remove('a')
+    assert not queue.take(group)
+    assert list(queue.tickets) == ['b']
+
+
+def test_rating_window_widens_with_waiting():
+    queue = MatchQueue(2)
+    gap = RATING_WINDOW + 5 * RATING_WIDEN
+    queue.add(ticket('a', 0))
+    queue.add(ticket('b', gap))
+    assert take_all(queue, now=4) == []
+    assert sids(take_all(queue, now=5)) == [['a', 'b']]
+
+
+def test_ping_buckets_only_mix_after_ping_widen_after():
+    queue = MatchQueue(2)
+    queue.add(ticket('near', 0, ping=0))
+    queue.add(ticket('far', 0, ping=3 * PING_BUCKET))
+    assert take_all(queue, now=PING_WIDEN_AFTER - 1) == []
+    assert sids(take_all(queue, now=PING_WIDEN_AFTER)) == [['far', 'near']]
+
+
+def test_parse_ping_treats_bad_input_as_zero():
+    assert parse_ping('42') == 42
+    assert parse_ping(17.9) == 17
+    for bad in ('abc', None, float('nan'), float('inf'), -5, [1]):
+        assert parse_ping(bad) == 0
+
+
+def test_default_names_are_never_rated():
+    profiles = ProfileStore(path=None)
+    profiles.record([{'name': 'Player', 'xp': 900}, {'name': 'bob', 'xp': 900}])
+    assert 'Player' not in profiles.profiles
+    assert profiles.rating('Player') == 0
+    assert profiles.rating('bob') > 0
+
+
+def test_lobby_matches_queued_players_into_a_room():
+    lobby = Lobby(ProfileStore(path=None))
+    lobby.handle_join('s1', {'name': 'ann', 'mode': 'pvp', 'ping': 'bogus'}, now=0)
+    lobby.handle_join('s2', {'name': 'bob', 'mode': 'pvp', 'ping': 20}, now=0)
+    run(lobby.match(now=0))
+    joins, messages = lobby.drain()
+    room_id = lobby.player_rooms['s1']
+    assert lobby.player_rooms['s2'] == room_id
+    assert sorted(joins) == [('s1', room_id), ('s2', room_id)]
+    assert ('matched', 's1') in [(event, to) for event, _, to in messages]
+
+
+def test_lobby_batch_respects_the_room_cap(monkeypatch):
+    monkeypatch.setattr(matchmaking, 'MAX_ROOMS_PER_BATCH', 3)
+    lobby = Lobby(ProfileStore(path=None))
+    for i in range(10):
+        lobby.handle_join(f"s{i}", {'name': f"p{i}", 'mode': 'pvp'}, now=0)
+    run(lobby.match(now=0))
+    assert len(lobby.rooms) == 3
+    assert len(lobby.queues['pvp']) == 4
+
+
+def test_lobby_skips_a_group_whose_player_left_mid_batch():
+    lobby = Lobby(ProfileStore(path=None))
+    for i in range(2 * (MATCH_YIELD_EVERY + 1)):
+        lobby.handle_join(f"s{i}", {'name': f"p{i}", 'mode': 'pvp'}, now=0)
+    batch = lobby.match(now=0)
+    next(batch)  # the first MATCH_YIELD_EVERY rooms are running
+    assert len(lobby.rooms) == MATCH_YIELD_EVERY
+    left, partner = list(lobby.queues['pvp'].tickets)[:2]
+    lobby.handle_disconnect(left)
+    run(batch)
+    assert left not in lobby.player_rooms and partner not in lobby.player_rooms
+    assert list(lobby.queues['pvp'].tickets) == [partner]
@@ -0,0 +1,58 @@
+from scheduler import TimerWheel
+
+
+def run(wheel, n):
+    for _ in range(n):
+        wheel.advance()
+
+
+def test_fires_on_the_due_tick():
+    wheel = TimerWheel(slots=8)
+    fired = []
+    wheel.schedule(3, lambda: fired.append(wheel.now))
+    run(wheel, 10)
+    assert fired == [3]
+
+
+def test_delay_longer_than_one_lap_waits_for_later_laps():
+    wheel = TimerWheel(slots=8)
+    fired = []
+    wheel.schedule(19, lambda: fired.append(wheel.now))
+    run(wheel, 18)
+    assert fired == []
+    run(wheel, 10)
+    assert fired == [19]
+
+
+def test_every_repeats_until_cancelled():
+    wheel = TimerWheel(slots=8)
+    fired = []
+    timer = wheel.every(5, lambda: fired.append(wheel.now))
+    run(wheel, 20)
+    timer.cancel()
+    run(wheel, 20)
+    assert fired == [5, 10, 15, 20]
+
+
+def test_cancelled_timer_never_fires():
+    wheel = TimerWheel(slots=8)
+    fired = []
+    timer = wheel.schedule(2, fired.append, 'x')
+    timer.cancel()
+    run(wheel, 10)
+    assert fired == []
+    assert wheel.slots == {}
+
+
+def test_cancel_all_from_a_callback_stops_the_rest_of_its_slot():
+    # A match ending inside a timer callback resets the room and cancels
+    # everything, including timers due on the same tick after it.
+    wheel = TimerWheel(slots=8)
+    fired = []
+    wheel.schedule(4, lambda: (fired.append('end'), wheel.cancel_all()))
+    wheel.schedule(4, fired.append, 'same tick')
+    wheel.every(2, fired.append, 'repeat')
+    wheel.schedule(12, fired.append, 'later')
+    run(wheel, 20)
+    assert fired == ['repeat', 'end']
+    assert wheel.slots == {}
@@ -0,0 +1,70 @@
+import json
+
+import matchmaking
+from game_server import SPECTATOR_DELAY, SPECTATOR_RATE, GameRoom, ticks
+from matchmaking import Lobby, ProfileStore
+
+FRAMES = SPECTATOR_DELAY * SPECTATOR_RATE
+TICKS_PER_FRAME = ticks(1 / SPECTATOR_RATE)
+
+
+def live_room():
+    room = GameRoom('r1')
+    room.handle_join('h1', {'name': 'ann', 'mode': 'pvp'})
+    room.drain()
+    return room
+
+
+def spectator_messages(room, ticks_run):
+    # (tick, data, to) for every spectate_state sent; now is the tick number.
+    sent = []
+    for i in range(1, ticks_run + 1):
+        room.tick(float(i))
+        sent.extend((i, data, to) for event, data, to in room.drain() if event == 'spectate_state')
+    return sent
+
+
+def test_first_frame_goes_out_only_after_the_delay():
+    room = live_room()
+    room.spectators.add('watcher')
+    sent = spectator_messages(room, (FRAMES + 1) * TICKS_PER_FRAME)
+    # FRAMES samples are buffered first; the next one releases the oldest,
+    # taken SPECTATOR_DELAY seconds earlier.
+    assert len(room.spectator_frames) == FRAMES + 1
+    assert [(tick, json.loads(data)['server_time']) for tick, data, _ in sent] == [
+        ((FRAMES + 1) * TICKS_PER_FRAME, TICKS_PER_FRAME)]
+
+
+def test_each_frame_is_one_pre_encoded_string_for_the_spectator_room():
+    room = live_room()
+    room.spectators.update({'w1', 'w2', 'w3'})
+    sent = spectator_messages(room, (FRAMES + 3) * TICKS_PER_FRAME)
+    assert len(sent) == 3
+    for _, data, to in sent:
+        assert isinstance(data, str)
+        assert to == room.spectator_room
+
+
+def test_room_without_spectators_records_nothing():
+    room = live_room()
+    assert spectator_messages(room, (FRAMES + 3) * TICKS_PER_FRAME) == []
+    assert len(room.spectator_frames) == 0
+    assert room.spectator_events == []
+
+
+def test_spectator_cap_is_enforced(monkeypatch):
+    monkeypatch.setattr(matchmaking, 'SPECTATOR_CAP', 2)
+    lobby = Lobby(ProfileStore(path=None))
+    lobby.handle_join('p1', {'name': 'ann', 'mode': 'pvp'}, now=0)
+    lobby.handle_join('p2', {'name': 'bob', 'mode': 'pvp'}, now=0)
+    for _ in lobby.match(now=0):
+        pass
+    room_id = lobby.player_rooms['p1']
+    lobby.drain()
+    for sid in ('w1', 'w2', 'w3'):
+        lobby.handle_spectate(sid, {'room': room_id})
+    joins, messages = lobby.drain()
+    assert lobby.rooms[room_id].spectators == {'w1', 'w2'}
+    assert joins == [('w1', f"{room_id}:spectators"), ('w2', f"{room_id}:spectators")]
+    assert [(event, to) for event, _, to in messages] == [
+        ('spectating', 'w1'), ('spectating', 'w2'), ('spectate_error', 'w3')]
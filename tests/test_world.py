@@ -0,0 +1,92 @@
+from game_server import GameRoom, view_rect
+from world import CHUNK_SIZE, World
+
+
+def make_world():
+    return World(8000, 6000, seed=1234)
+
+
+def test_same_seed_regenerates_identical_chunks_after_evict():
+    world = make_world()
+    before = world.serialize_chunk((3, 4))
+    world.evict(set())
+    assert world.chunks == {}
+    assert world.serialize_chunk((3, 4)) == before
+    assert make_world().serialize_chunk((3, 4)) == before
+    assert World(8000, 6000, seed=99).serialize_chunk((3, 4)) != before
+
+
+def test_obstacles_and_bushes_stay_inside_their_chunk():
+    world = World(8000, 6100, seed=7)  # the bottom row is cut short
+    for cx in range(world.cols):
+        for cy in range(world.rows):
+            chunk = world.get_chunk(cx, cy)
+            left, top = cx * CHUNK_SIZE, cy * CHUNK_SIZE
+            right = min(left + CHUNK_SIZE, world.width)
+            bottom = min(top + CHUNK_SIZE, world.height)
+            for box in chunk['obstacles'] + chunk['bushes']:
+                assert left <= box['x'] and box['x'] + box['width'] <= right
+                assert top <= box['y'] and box['y'] + box['height'] <= bottom
+
+
+def test_damaged_chunk_survives_evict():
+    world = make_world()
+    chunk = world.get_chunk(2, 2)
+    world.get_chunk(5, 5)
+    obs = chunk['obstacles'][0]
+    assert not world.damage_obstacle(obs, 10)
+    world.evict(set())
+    assert list(world.chunks) == [(2, 2)]
+    assert world.get_chunk(2, 2)['obstacles'][0]['health'] == obs['health'] == 40
+
+
+def streaming_room():
+    room = GameRoom('r')
+    room.world = make_world()
+    room.players = {'h': {'sid': 'h', 'x': 2000, 'y': 2000, 'mode': 'human', 'alive': True}}
+    return room
+
+
+def sent_chunks(room):
+    messages = [data for event, data, to in room.drain() if event == 'world_chunks']
+    assert len(messages) <= 1
+    return messages[0] if messages else None
+
+
+def test_stream_chunks_sends_only_new_or_changed_chunks():
+    room = streaming_room()
+    player = room.players['h']
+    visible = room.stream_chunks('h', player)
+    first = sent_chunks(room)
+    assert sorted((c['cx'], c['cy']) for c in first['chunks']) == sorted(visible)
+    assert visible == room.world.chunk_keys_in_rect(*view_rect(player))
+    # Nothing changed: nothing is sent.
+    room.stream_chunks('h', player)
+    assert sent_chunks(room) is None
+    # Damage one visible chunk: only that one goes out again.
+    key = next(k for k in visible if room.world.get_chunk(*k)['obstacles'])
+    room.world.damage_obstacle(room.world.get_chunk(*key)['obstacles'][0], 10)
+    room.stream_chunks('h', player)
+    assert [(c['cx'], c['cy']) for c in sent_chunks(room)['chunks']] == [key]
+
+
+def test_stream_chunks_reports_dropped_keys():
+    room = streaming_room()
+    player = room.players['h']
+    old = set(room.stream_chunks('h', player))
+    room.drain()
+    player['x'] += 3 * CHUNK_SIZE
+    new = set(room.stream_chunks('h', player))
+    update = sent_chunks(room)
+    assert set(update['drop']) == old - new
+    assert {(c['cx'], c['cy']) for c in update['chunks']} == new - old
+    assert set(room.client_chunks['h']) == new
+
+
+def test_stray_bullets_outside_every_view_are_dropped():
+    room = streaming_room()
+    near = {'id': 1, 'x': 2100, 'y': 2000}
+    far = {'id': 2, 'x': 7000, 'y': 5000}
+    room.bullets = [near, far]
+    room.drop_stray_bullets()
+    assert room.bullets == [near]
@@ -0,0 +1,135 @@
+import random
+
+# -------------------------------
+# LARGE-WORLD TERRAIN
+# -------------------------------
+# The large world is split into fixed-size square chunks. Each chunk's
+# obstacles and bushes are generated from (seed, cx, cy) the first time the
+# chunk is touched, so the same seed always produces the same map and chunks
+# nobody is near never have to exist in memory.
+
+CHUNK_SIZE = 400
+OBSTACLES_PER_CHUNK = (1, 3)   # inclusive range
+BUSHES_PER_CHUNK = (0, 2)      # inclusive range
+OBSTACLE_HEALTH = 50
+
+
+class World:
+    def __init__(self, width, height, seed, chunk_size=CHUNK_SIZE):
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.cols = (width + chunk_size - 1) // chunk_size
+        self.rows = (height + chunk_size - 1) // chunk_size
+        self.chunks = {}  # key: (cx, cy), value: chunk dictionary
+
+    # ---- chunk access ----
+    def chunk_key(self, x, y):
+        return (int(x) // self.chunk_size, int(y) // self.chunk_size)
+
+    def get_chunk(self, cx, cy):
+        key = (cx, cy)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self._generate_chunk(cx, cy)
+            self.chunks[key] = chunk
+        return chunk
+
+    def chunk_keys_in_rect(self, x, y, width, height):
+        """Keys of every in-bounds chunk overlapping the given rectangle."""
+        cx0 = max(0, int(x) // self.chunk_size)
+        cy0 = max(0, int(y) // self.chunk_size)
+        cx1 = min(self.cols - 1, int(x + width) // self.chunk_size)
+        cy1 = min(self.rows - 1, int(y + height) // self.chunk_size)
+        return [(cx, cy) for cy in range(cy0, cy1 + 1) for cx in range(cx0, cx1 + 1)]
+
+    def obstacles_near(self, x, y, width=0, height=0):
+        # Obstacles never cross a chunk border, so only the chunks overlapping
+        # the query rectangle need to be looked at.
+        found = []
+        for cx, cy in self.chunk_keys_in_rect(x, y, width, height):
+            found.extend(self.get_chunk(cx, cy)['obstacles'])
+        return found
+
+    def bushes_near(self, x, y, width=0, height=0):
+        found = []
+        for cx, cy in self.chunk_keys_in_rect(x, y, width, height):
+            found.extend(self.get_chunk(cx, cy)['bushes'])
+        return found
+
+    # ---- mutation ----
+    def damage_obstacle(self, obs, damage):
+        """Apply damage to an obstacle. Returns True if it was destroyed."""
+        chunk = self.get_chunk(*obs['chunk'])
+        obs['health'] -= damage
+        chunk['version'] += 1
+        if obs['health'] <= 0:
+            if obs in chunk['obstacles']:
+                chunk['obstacles'].remove(obs)
+            return True
+        return False
+
+    def evict(self, keep_keys):
+        """
+        Drop chunks that are not in keep_keys and have never been modified.
+        Untouched chunks can be regenerated from the seed at any time, so
+        only damaged terrain has to stay resident.
+        """
+        for key in list(self.chunks):
+            if key not in keep_keys and self.chunks[key]['version'] == 0:
+                del self.chunks[key]
+
+    # ---- generation ----
+    def _generate_chunk(self, cx, cy):
+        rng = random.Random(hash((self.seed, cx, cy)))
+        x0 = cx * self.chunk_size
+        y0 = cy * self.chunk_size
+        # Chunks along the right/bottom edge may be cut short by the world size.
+        size_w = min(self.chunk_size, self.width - x0)
+        size_h = min(self.chunk_size, self.height - y0)
+        obstacles = []
+        for i in range(rng.randint(*OBSTACLES_PER_CHUNK)):
+            width = rng.randint(40, 100)
+            height = rng.randint(40, 100)
+            if size_w < width + 20 or size_h < height + 20:
+                continue
+            obstacles.append({
+                'id': f"{cx}:{cy}:{i}",
+                'chunk': (cx, cy),
+                'x': x0 + rng.randint(10, size_w - width - 10),
+                'y': y0 + rng.randint(10, size_h - height - 10),
+                'width': width,
+                'height': height,
+                'health': OBSTACLE_HEALTH
+            })
+        bushes = []
+        for _ in range(rng.randint(*BUSHES_PER_CHUNK)):
+            if size_w < 80 or size_h < 80:
+                continue
+            bushes.append({
+                'x': x0 + rng.randint(10, size_w - 70),
+                'y': y0 + rng.randint(10, size_h - 70),
+                'width': 60,
+                'height': 60
+            })
+        return {
+            'cx': cx,
+            'cy': cy,
+            'obstacles': obstacles,
+            'bushes': bushes,
+            'version': 0
+        }
+
+    def serialize_chunk(self, key):
+        chunk = self.get_chunk(*key)
+        return {
+            'cx': chunk['cx'],
+            'cy': chunk['cy'],
+            'version': chunk['version'],
+            'obstacles': [
+                {k: obs[k] for k in ('id', 'x', 'y', 'width', 'height', 'health')}
+                for obs in chunk['obstacles']
+            ],
+            'bushes': chunk['bushes']
+        }